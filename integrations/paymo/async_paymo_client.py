@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Async Paymo API Client for PineAI Consulting
+asyncio variant of PaymoClient for workflows that fan out over many projects
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from integrations.paymo.paymo_client import (
+    BACKOFF_BASE, BACKOFF_CAP, IDEMPOTENT_METHODS, RETRY_STATUSES,
+    client_summaries, client_summary, entry_filters, entry_totals
+)
+
+
+class AsyncPaymoClient:
+    """asyncio Paymo client with the same methods as PaymoClient
+
+    One connection pool is shared by every call, and at most
+    ``max_concurrency`` requests are in flight. Use as an async context
+    manager, or call ``close()`` when done.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None):
+        self.api_key = os.getenv('PAYMO_API_KEY')
+        self.api_url = os.getenv('PAYMO_API_URL', 'https://app.paymoapp.com/api')
+        self.max_concurrency = max_concurrency or int(os.getenv('PAYMO_POOL_SIZE', '10'))
+        self.timeout = timeout or float(os.getenv('PAYMO_TIMEOUT', '30'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('PAYMO_MAX_RETRIES', '5'))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.api_key or '', 'api-key'),
+                headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None):
+        """Make authenticated request to Paymo API"""
+        session = self._get_session()
+        url = f"{self.api_url}/{endpoint}"
+        kwargs = {'params': data} if method == 'GET' else {'json': data}
+
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                async with session.request(method, url, **kwargs) as response:
+                    retryable = (response.status == 429
+                                 or (response.status in RETRY_STATUSES and method in IDEMPOTENT_METHODS))
+                    if not retryable or attempt == self.max_retries:
+                        response.raise_for_status()
+                        text = await response.text()
+                        return json.loads(text) if text else None
+                    retry_after = response.headers.get('Retry-After')
+
+            # Back off outside the semaphore so other requests keep flowing
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            await asyncio.sleep(delay)
+
+    # Client Management
+    async def create_client(self, client_data: Dict) -> Dict:
+        """Create a new client"""
+        if 'name' not in client_data:
+            raise ValueError("Required field 'name' missing")
+        return await self._make_request('POST', 'clients', client_data)
+
+    async def get_clients(self, page: int = 1, limit: int = 100) -> List[Dict]:
+        """Get all clients with pagination"""
+        response = await self._make_request('GET', 'clients', {'page': page, 'limit': limit})
+        return response.get('clients', [])
+
+    # Project Management
+    async def create_project(self, project_data: Dict) -> Dict:
+        """Create a new project"""
+        for field in ('name', 'client_id'):
+            if field not in project_data:
+                raise ValueError(f"Required field '{field}' missing")
+        project_data.setdefault('billable', True)
+        project_data.setdefault('active', True)
+        return await self._make_request('POST', 'projects', project_data)
+
+    async def get_projects(self, active_only: bool = True) -> List[Dict]:
+        """Get all projects"""
+        params = {'where': 'active=true'} if active_only else {}
+        response = await self._make_request('GET', 'projects', params)
+        return response.get('projects', [])
+
+    async def update_project(self, project_id: str, update_data: Dict) -> Dict:
+        """Update project details"""
+        return await self._make_request('PUT', f'projects/{project_id}', update_data)
+
+    # Task Management
+    async def create_task(self, task_data: Dict) -> Dict:
+        """Create a new task"""
+        for field in ('name', 'project_id'):
+            if field not in task_data:
+                raise ValueError(f"Required field '{field}' missing")
+        return await self._make_request('POST', 'tasks', task_data)
+
+    async def get_project_tasks(self, project_id: str) -> List[Dict]:
+        """Get all tasks for a project"""
+        response = await self._make_request('GET', 'tasks', {'where': f'project_id={project_id}'})
+        return response.get('tasks', [])
+
+    async def get_tasks_for_projects(self, project_ids: Iterable) -> Dict[str, List[Dict]]:
+        """Get tasks for many projects concurrently, keyed by project ID"""
+        project_ids = list(project_ids)
+        results = await asyncio.gather(*(self.get_project_tasks(pid) for pid in project_ids))
+        return dict(zip(project_ids, results))
+
+    # Time Tracking
+    async def create_time_entry(self, entry_data: Dict) -> Dict:
+        """Create a time entry"""
+        for field in ('task_id', 'date', 'duration'):
+            if field not in entry_data:
+                raise ValueError(f"Required field '{field}' missing")
+        return await self._make_request('POST', 'entries', entry_data)
+
+    async def get_time_entries(self, start_date: str, end_date: str) -> List[Dict]:
+        """Get time entries for date range"""
+        params = {'where': f"date>={start_date} AND date<={end_date}"}
+        response = await self._make_request('GET', 'entries', params)
+        return response.get('entries', [])
+
+    # Invoicing
+    async def create_invoice(self, invoice_data: Dict) -> Dict:
+        """Create a new invoice"""
+        for field in ('client_id', 'date', 'due_date'):
+            if field not in invoice_data:
+                raise ValueError(f"Required field '{field}' missing")
+        invoice_data.setdefault('status', 'draft')
+        invoice_data.setdefault('currency', 'USD')
+        return await self._make_request('POST', 'invoices', invoice_data)
+
+    async def add_invoice_line(self, invoice_id: str, line_data: Dict) -> Dict:
+        """Add line item to invoice"""
+        for field in ('description', 'amount'):
+            if field not in line_data:
+                raise ValueError(f"Required field '{field}' missing")
+        line_data['invoice_id'] = invoice_id
+        return await self._make_request('POST', 'invoicelines', line_data)
+
+    async def send_invoice(self, invoice_id: str, message: str = None) -> Dict:
+        """Send invoice to client"""
+        data = {
+            'action': 'send',
+            'message': message or 'Please find attached your invoice.'
+        }
+        return await self._make_request('POST', f'invoices/{invoice_id}/send', data)
+
+    async def get_invoices(self, status: str = None) -> List[Dict]:
+        """Get invoices, optionally filtered by status"""
+        params = {'where': f"status={status}"} if status else {}
+        response = await self._make_request('GET', 'invoices', params)
+        return response.get('invoices', [])
+
+    async def get_invoice_lines(self, invoice_id: str = None) -> List[Dict]:
+        """Get invoice lines, optionally for a single invoice"""
+        params = {'where': f"invoice_id={invoice_id}"} if invoice_id else {}
+        response = await self._make_request('GET', 'invoicelines', params)
+        return response.get('invoicelines', [])
+
+    async def get_updated_since(self, resource: str, timestamp: str) -> List[Dict]:
+        """Get records of a resource (entries, invoices, ...) updated after an ISO timestamp"""
+        response = await self._make_request('GET', resource, {'where': f'updated_on>"{timestamp}"'})
+        return response.get(resource, [])
+
+    # Reports
+    async def get_project_profitability(self, project_id: str) -> Dict:
+        """Get profitability report for a project"""
+        return await self._make_request('GET', f'reports/project/{project_id}/profitability')
+
+    async def get_client_summary(self, client_id: str) -> Dict:
+        """Get summary report for a client"""
+        params = {'where': f'client_id={client_id} and active=true'}
+        response = await self._make_request('GET', 'projects', params)
+        client_projects = response.get('projects', [])
+
+        totals = await self._project_entry_totals([p['id'] for p in client_projects])
+        return client_summary(client_id, client_projects, totals)
+
+    async def get_all_client_summaries(self) -> Dict[str, Dict]:
+        """Get summary reports for every client in one pass, keyed by client ID"""
+        projects = await self.get_projects()
+        totals = await self._project_entry_totals([p['id'] for p in projects])
+        return client_summaries(projects, totals)
+
+    async def _project_entry_totals(self, project_ids: Iterable) -> Dict:
+        """Sum entry seconds and billed amounts per project, one concurrent request per batch"""
+        pages = await asyncio.gather(*(
+            self._make_request('GET', 'entries', {'where': where}) for where in entry_filters(project_ids)
+        ))
+        return entry_totals([entry for page in pages for entry in page.get('entries', [])])
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.paymo.async_paymo_client [get_projects|project_tasks|client_summaries]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    async def main():
+        async with AsyncPaymoClient() as client:
+            if command == "get_projects":
+                return await client.get_projects()
+            elif command == "project_tasks":
+                projects = await client.get_projects()
+                return await client.get_tasks_for_projects(p['id'] for p in projects)
+            elif command == "client_summaries":
+                return await client.get_all_client_summaries()
+
+    result = asyncio.run(main())
+    print(json.dumps(result, indent=2, default=str))
@@ -6,33 +6,385 @@ Handles project management and invoicing
 
 import os
 import json
+import time
+import random
+import hashlib
+import logging
+import threading
 import requests
-from typing import Dict, List, Optional
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+try:
+    import numpy
+except ImportError:  # optional: vectorized entry totals
+    numpy = None
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# How long the email -> client index is trusted before it is reloaded
+CLIENT_INDEX_TTL = 900
+
+# Project IDs per "project_id in (...)" filter, keeping request URLs short
+PROJECT_ID_BATCH = 50
+
+# Lines sent inside the invoice create request; the rest are posted one by one, in order
+INVOICE_LINES_PER_CREATE = 50
+
+INVOICE_JOURNAL_DIR = os.path.join(
+    os.getenv('PINEAI_CACHE_DIR', os.path.expanduser('~/.pineai')), 'paymo_invoices'
+)
+
+# GET responses kept in memory for conditional revalidation
+RESPONSE_CACHE_SIZE = 256
+
+# Only these are replayed after a 5xx; 429 means "not processed" and is always retried
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+RETRY_STATUSES = {500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+
+
+def entry_filters(project_ids: Iterable) -> List[str]:
+    """``project_id in (...)`` filters covering project_ids, PROJECT_ID_BATCH at a time"""
+    project_ids = [str(pid) for pid in project_ids]
+    return [
+        f"project_id in ({','.join(project_ids[start:start + PROJECT_ID_BATCH])})"
+        for start in range(0, len(project_ids), PROJECT_ID_BATCH)
+    ]
+
+
+def entry_totals(entries: List[Dict]) -> Dict:
+    """Sum entry seconds and billed amounts per project ID; missing or null values count as 0"""
+    if numpy is not None and entries:
+        count = len(entries)
+        project_ids, codes = numpy.unique([e['project_id'] for e in entries], return_inverse=True)
+        durations = numpy.fromiter((e.get('duration') or 0 for e in entries), dtype=numpy.float64, count=count)
+        amounts = numpy.fromiter((e.get('billed_amount') or 0 for e in entries), dtype=numpy.float64, count=count)
+        project_ids = project_ids.tolist()
+        return {
+            'seconds': dict(zip(project_ids, numpy.bincount(codes, weights=durations).tolist())),
+            'revenue': dict(zip(project_ids, numpy.bincount(codes, weights=amounts).tolist()))
+        }
+    
+    seconds = defaultdict(float)
+    revenue = defaultdict(float)
+    for entry in entries:
+        seconds[entry['project_id']] += entry.get('duration') or 0
+        revenue[entry['project_id']] += entry.get('billed_amount') or 0
+    return {'seconds': seconds, 'revenue': revenue}
+
+
+def client_summary(client_id, projects: List[Dict], totals: Dict) -> Dict:
+    """Summary report for one client from its projects and entry_totals()"""
+    total_seconds = sum(totals['seconds'].get(p['id'], 0) for p in projects)
+    total_revenue = sum(totals['revenue'].get(p['id'], 0) for p in projects)
+    
+    return {
+        'client_id': client_id,
+        'total_projects': len(projects),
+        'total_hours': round(total_seconds / 3600, 2),  # Convert to hours
+        'total_revenue': round(total_revenue, 2),
+        'active_projects': len([p for p in projects if p.get('active')])
+    }
+
+
+def client_summaries(projects: List[Dict], totals: Dict) -> Dict[str, Dict]:
+    """Summary reports for every client owning one of projects, keyed by client ID"""
+    projects_by_client = defaultdict(list)
+    for project in projects:
+        projects_by_client[project.get('client_id')].append(project)
+    return {
+        client_id: client_summary(client_id, client_projects, totals)
+        for client_id, client_projects in projects_by_client.items()
+    }
+
+
+class ProjectTree:
+    """Projects with their tasks and time entries, linked by ID"""
+    
+    __slots__ = ('projects', 'tasks', 'entries', 'task_ids_by_project', 'entry_ids_by_task')
+    
+    def __init__(self):
+        self.projects: Dict[int, Dict] = {}
+        self.tasks: Dict[int, Dict] = {}
+        self.entries: Dict[int, Dict] = {}
+        self.task_ids_by_project: Dict[int, List[int]] = defaultdict(list)
+        self.entry_ids_by_task: Dict[int, List[int]] = defaultdict(list)
+    
+    def add_project(self, project: Dict):
+        """Add a project returned with included tasks (and their entries)"""
+        project = dict(project)
+        tasks = project.pop('tasks', [])
+        self.projects[project['id']] = project
+        
+        for task in tasks:
+            task = dict(task)
+            entries = task.pop('entries', [])
+            self.tasks[task['id']] = task
+            self.task_ids_by_project[project['id']].append(task['id'])
+            
+            for entry in entries:
+                self.entries[entry['id']] = entry
+                self.entry_ids_by_task[task['id']].append(entry['id'])
+    
+    def project_tasks(self, project_id: int) -> List[Dict]:
+        return [self.tasks[task_id] for task_id in self.task_ids_by_project.get(project_id, [])]
+    
+    def task_entries(self, task_id: int) -> List[Dict]:
+        return [self.entries[entry_id] for entry_id in self.entry_ids_by_task.get(task_id, [])]
+    
+    def project_entries(self, project_id: int) -> List[Dict]:
+        return [
+            entry
+            for task_id in self.task_ids_by_project.get(project_id, [])
+            for entry in self.task_entries(task_id)
+        ]
+
+
+class ResponseCache:
+    """LRU of GET responses with their ETag/Last-Modified validators
+    
+    Entries are revalidated on every read, so a hit costs a 304 instead of a
+    full payload. With ``directory`` entries also persist across processes.
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = os.path.expanduser(directory) if directory else None
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+    
+    @staticmethod
+    def key(endpoint: str, params: Optional[Dict]) -> str:
+        query = '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{endpoint}?{query}"
+    
+    @staticmethod
+    def resources(key: str) -> List[str]:
+        """Resources a cached response depends on: the endpoint and its includes"""
+        endpoint, _, query = key.partition('?')
+        names = {endpoint.split('/')[0]}
+        for part in query.split('&'):
+            if part.startswith('include='):
+                names.update(name for path in part[8:].split(',') for name in path.split('.'))
+        return sorted(names)
+    
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{'+'.join(self.resources(key))}.{digest}.json")
+    
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        
+        if self.directory and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember(key, entry)
+            return entry
+        return None
+    
+    def store(self, key: str, response: requests.Response):
+        """Keep a 200 response that carries a validator"""
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': response.text
+        }
+        if not (entry['etag'] or entry['last_modified']):
+            return
+        self._remember(key, entry)
+        
+        if self.directory:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+    
+    def _remember(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, resource: str):
+        """Drop every response that depends on a resource"""
+        with self._lock:
+            for key in [k for k in self._entries if resource in self.resources(k)]:
+                del self._entries[key]
+        
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if resource in entry.name.split('.', 1)[0].split('+'):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+    
+    @staticmethod
+    def validators(entry: Dict) -> Dict:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+
+class TokenBucket:
+    """Request pacing learned from Paymo's X-Ratelimit-* response headers"""
+    
+    def __init__(self):
+        self.rate: Optional[float] = None
+        self.capacity = 0.0
+        self.tokens = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def acquire(self):
+        """Take a token, sleeping until one is available (no-op until a limit is known)"""
+        with self._lock:
+            if not self.rate:
+                return
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+    
+    def update(self, headers):
+        try:
+            limit = float(headers['X-Ratelimit-Limit'])
+            remaining = float(headers['X-Ratelimit-Remaining'])
+            period = float(headers.get('X-Ratelimit-Decay-Period', 3600))
+        except (KeyError, ValueError):
+            return
+        
+        with self._lock:
+            self._refill(time.monotonic())
+            if not self.rate:
+                self.tokens = remaining
+            self.rate = limit / period
+            self.capacity = limit
+            # Other clients share the quota, so the server's count wins when lower
+            self.tokens = min(self.tokens, remaining)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Transport adapter adding pacing, retries with backoff and a default timeout"""
+    
+    def __init__(self, pool_size: int = 10, timeout: float = 30, max_retries: int = 5):
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.timeout = timeout
+        self.retries = max_retries
+        self.bucket = TokenBucket()
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            self.bucket.acquire()
+            try:
+                response = super().send(request, **kwargs)
+            except requests.ConnectTimeout:
+                # Nothing reached the server, so any method can be resent
+                if last_attempt:
+                    raise
+                self._backoff(attempt)
+                continue
+            
+            self.bucket.update(response.headers)
+            retryable = (response.status_code == 429
+                         or (response.status_code in RETRY_STATUSES and request.method in IDEMPOTENT_METHODS))
+            if not retryable or last_attempt:
+                return response
+            response.close()
+            self._backoff(attempt, response.headers.get('Retry-After'))
+    
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str] = None):
+        """Sleep for Retry-After, or a full-jitter exponential delay"""
+        if retry_after:
+            try:
+                time.sleep(float(retry_after))
+                return
+            except ValueError:
+                pass
+        time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
 
 class PaymoClient:
     """Paymo API client for project management and invoicing"""
     
-    def __init__(self):
+    def __init__(self, client_index_path: Optional[str] = None,
+                 cache_size: Optional[int] = None, cache_dir: Optional[str] = None,
+                 pool_size: Optional[int] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None):
         self.api_key = os.getenv('PAYMO_API_KEY')
         self.api_url = os.getenv('PAYMO_API_URL', 'https://app.paymoapp.com/api')
         self.session = requests.Session()
+        
+        # One pooled, rate-limited adapter shared by every thread using this client
+        self.adapter = RateLimitedAdapter(
+            pool_size=pool_size or int(os.getenv('PAYMO_POOL_SIZE', '10')),
+            timeout=timeout or float(os.getenv('PAYMO_TIMEOUT', '30')),
+            max_retries=max_retries if max_retries is not None else int(os.getenv('PAYMO_MAX_RETRIES', '5'))
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
         self.session.auth = (self.api_key, 'api-key')
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        
+        # Email -> client index, optionally persisted so CLI runs can reuse it
+        self.client_index_path = client_index_path or os.getenv('PAYMO_CLIENT_INDEX_FILE')
+        self._client_index = None
+        self._client_index_loaded_at = 0.0
+        self._client_index_lock = threading.RLock()
+        
+        # Conditional-GET cache; a size of 0 disables it
+        cache_size = int(os.getenv('PAYMO_CACHE_SIZE', RESPONSE_CACHE_SIZE)) if cache_size is None else cache_size
+        cache_dir = cache_dir or os.getenv('PAYMO_CACHE_DIR') or None
+        self.response_cache = ResponseCache(cache_size, cache_dir) if cache_size > 0 else None
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None):
         """Make authenticated request to Paymo API"""
         url = f"{self.api_url}/{endpoint}"
+        cache = self.response_cache
         
         if method == 'GET':
-            response = self.session.get(url, params=data)
+            cache_key = ResponseCache.key(endpoint, data) if cache else None
+            cached = cache.get(cache_key) if cache else None
+            headers = ResponseCache.validators(cached) if cached else None
+            response = self.session.get(url, params=data, headers=headers)
+            if cached and response.status_code == 304:
+                return json.loads(cached['body']) if cached['body'] else None
         elif method == 'POST':
             response = self.session.post(url, json=data)
         elif method == 'PUT':
@@ -40,7 +392,16 @@ class PaymoClient:
         elif method == 'DELETE':
             response = self.session.delete(url)
         
+        if method != 'GET':
+            resource = endpoint.split('/')[0]
+            if resource == 'clients':
+                self._update_client_index(method, endpoint, response)
+            if cache:
+                cache.invalidate(resource)
+        
         response.raise_for_status()
+        if method == 'GET' and cache and response.status_code == 200:
+            cache.store(cache_key, response)
         return response.json() if response.text else None
     
     # Client Management
@@ -63,13 +424,88 @@ class PaymoClient:
         response = self._make_request('GET', 'clients', params)
         return response.get('clients', [])
     
-    def get_client_by_email(self, email: str) -> Optional[Dict]:
-        """Find client by email"""
-        clients = self.get_clients()
-        for client in clients:
-            if client.get('email') == email:
-                return client
-        return None
+    def iter_clients(self, limit: int = 100) -> Iterator[Dict]:
+        """Yield every client, page by page"""
+        page = 1
+        while True:
+            clients = self.get_clients(page=page, limit=limit)
+            yield from clients
+            if len(clients) < limit:
+                return
+            page += 1
+    
+    def get_client_by_email(self, email: str, refresh: bool = False) -> Optional[Dict]:
+        """Find client by email using the cached email index"""
+        with self._client_index_lock:
+            if refresh or not self._client_index_is_fresh():
+                self._load_client_index(force=refresh)
+            return self._client_index.get(email.strip().lower())
+    
+    def invalidate_client_index(self):
+        """Drop the email index so the next lookup reloads every client"""
+        with self._client_index_lock:
+            self._client_index = None
+            self._client_index_loaded_at = 0.0
+            self._remove_client_index_file()
+    
+    def _update_client_index(self, method: str, endpoint: str, response: requests.Response):
+        """Keep the email index in step with a client write
+        
+        A created client is added to the in-memory index. Any write removes
+        the persisted index, which is only ever written from a full listing,
+        so other processes rebuild it instead of reading a stale copy.
+        """
+        created = []
+        if method == 'POST' and endpoint == 'clients' and response.ok and response.text:
+            created = response.json().get('clients', [])
+        
+        with self._client_index_lock:
+            if not created or self._client_index is None:
+                self.invalidate_client_index()
+                return
+            for client in created:
+                self._index_client(client)
+            self._remove_client_index_file()
+    
+    def _client_index_is_fresh(self) -> bool:
+        return (self._client_index is not None
+                and time.time() - self._client_index_loaded_at < CLIENT_INDEX_TTL)
+    
+    def _index_client(self, client: Dict):
+        if client.get('email'):
+            self._client_index[client['email'].strip().lower()] = client
+    
+    def _load_client_index(self, force: bool = False):
+        """Load the index from disk if still fresh, otherwise from every client page"""
+        if not force and self.client_index_path and os.path.exists(self.client_index_path):
+            with open(self.client_index_path) as f:
+                stored = json.load(f)
+            if time.time() - stored['loaded_at'] < CLIENT_INDEX_TTL:
+                self._client_index = stored['clients']
+                self._client_index_loaded_at = stored['loaded_at']
+                return
+        
+        self._client_index = {}
+        for client in self.iter_clients():
+            self._index_client(client)
+        self._client_index_loaded_at = time.time()
+        self._save_client_index()
+    
+    def _remove_client_index_file(self):
+        if self.client_index_path:
+            try:
+                os.remove(self.client_index_path)
+            except FileNotFoundError:
+                pass
+    
+    def _save_client_index(self):
+        if not self.client_index_path:
+            return
+        os.makedirs(os.path.dirname(self.client_index_path) or '.', exist_ok=True)
+        tmp_path = f"{self.client_index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'loaded_at': self._client_index_loaded_at, 'clients': self._client_index}, f)
+        os.replace(tmp_path, self.client_index_path)
     
     # Project Management
     def create_project(self, project_data: Dict) -> Dict:
@@ -91,6 +527,43 @@ class PaymoClient:
         response = self._make_request('GET', 'projects', params)
         return response.get('projects', [])
     
+    def get_project_tree(self, project_ids: Optional[List] = None,
+                         include: tuple = ('tasks', 'entries'),
+                         active_only: bool = True, max_workers: int = 4) -> ProjectTree:
+        """Fetch projects with their tasks and entries using Paymo includes
+        
+        Without ``project_ids`` this is a single request; otherwise projects
+        are requested in concurrent batches of PROJECT_ID_BATCH.
+        """
+        # Entries hang off tasks, so they are included through them
+        includes = ['tasks.entries' if name == 'entries' else name for name in include]
+        if 'tasks.entries' in includes and 'tasks' not in includes:
+            includes.insert(0, 'tasks')
+        
+        def fetch(where: Optional[str]):
+            conditions = [c for c in (where, 'active=true' if active_only else None) if c]
+            params = {'include': ','.join(includes)}
+            if conditions:
+                params['where'] = ' and '.join(conditions)
+            return self._make_request('GET', 'projects', params).get('projects', [])
+        
+        if project_ids is None:
+            pages = [fetch(None)]
+        else:
+            ids = list(project_ids)
+            batches = [
+                f"id in ({','.join(str(pid) for pid in ids[start:start + PROJECT_ID_BATCH])})"
+                for start in range(0, len(ids), PROJECT_ID_BATCH)
+            ]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pages = list(executor.map(fetch, batches))
+        
+        tree = ProjectTree()
+        for projects in pages:
+            for project in projects:
+                tree.add_project(project)
+        return tree
+    
     def update_project(self, project_id: str, update_data: Dict) -> Dict:
         """Update project details"""
         return self._make_request('PUT', f'projects/{project_id}', update_data)
@@ -129,6 +602,78 @@ class PaymoClient:
         response = self._make_request('GET', 'entries', params)
         return response.get('entries', [])
     
+    def iter_time_entries(self, start_date: str, end_date: str, window_days: int = 7,
+                          max_workers: int = 4, checkpoint_path: Optional[str] = None) -> Iterator[Dict]:
+        """Stream time entries for a long date range in date order
+        
+        The range is split into windows of ``window_days`` that are fetched
+        concurrently, at most ``max_workers`` windows ahead of the caller.
+        With ``checkpoint_path`` each finished window is recorded so an
+        interrupted export resumes after the last one.
+        """
+        windows = self._date_windows(start_date, end_date, window_days)
+        
+        checkpoint = self._read_export_checkpoint(checkpoint_path, start_date, end_date)
+        if checkpoint:
+            windows = [w for w in windows if w[1] > checkpoint]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            remaining = iter(windows)
+            in_flight = deque()
+            for window in remaining:
+                in_flight.append((window, executor.submit(self.get_time_entries, *window)))
+                if len(in_flight) >= max_workers:
+                    break
+            
+            while in_flight:
+                (_, window_end), future = in_flight.popleft()
+                entries = future.result()
+                
+                next_window = next(remaining, None)
+                if next_window:
+                    in_flight.append((next_window, executor.submit(self.get_time_entries, *next_window)))
+                
+                entries.sort(key=lambda e: (e.get('date') or (e.get('start_time') or '')[:10], e.get('id', 0)))
+                yield from entries
+                
+                if checkpoint_path:
+                    self._write_export_checkpoint(checkpoint_path, start_date, end_date, window_end)
+    
+    @staticmethod
+    def _date_windows(start_date: str, end_date: str, window_days: int) -> List[tuple]:
+        """Split an inclusive date range into inclusive (start, end) windows"""
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        
+        windows = []
+        while start <= end:
+            window_end = min(start + timedelta(days=window_days - 1), end)
+            windows.append((start.isoformat(), window_end.isoformat()))
+            start = window_end + timedelta(days=1)
+        return windows
+    
+    @staticmethod
+    def _read_export_checkpoint(path: Optional[str], start_date: str, end_date: str) -> Optional[str]:
+        """Return the last completed window end for this exact range, if any"""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get('start_date'), checkpoint.get('end_date')) != (start_date, end_date):
+            return None
+        return checkpoint.get('completed_through')
+    
+    @staticmethod
+    def _write_export_checkpoint(path: str, start_date: str, end_date: str, completed_through: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'start_date': start_date,
+                'end_date': end_date,
+                'completed_through': completed_through
+            }, f)
+        os.replace(tmp_path, path)
+    
     # Invoicing
     def create_invoice(self, invoice_data: Dict) -> Dict:
         """Create a new invoice"""
@@ -153,6 +698,90 @@ class PaymoClient:
         line_data['invoice_id'] = invoice_id
         return self._make_request('POST', 'invoicelines', line_data)
     
+    def create_invoice_with_lines(self, invoice_data: Dict, lines: List[Dict],
+                                  idempotency_key: Optional[str] = None) -> Dict:
+        """Create an invoice and its lines, resuming safely after a partial failure
+        
+        The first INVOICE_LINES_PER_CREATE lines are sent as ``items`` with the
+        invoice itself; the rest are posted in order, as lines appear in the
+        order they are created. Progress is journaled under ``idempotency_key``
+        (by default a hash of the arguments), so calling again with the same
+        arguments only sends what is still missing.
+        """
+        for field in ('client_id', 'date', 'due_date'):
+            if field not in invoice_data:
+                raise ValueError(f"Required field '{field}' missing")
+        for line in lines:
+            for field in ('description', 'amount'):
+                if field not in line:
+                    raise ValueError(f"Required field '{field}' missing")
+        
+        line_keys = [self._line_key(i, line) for i, line in enumerate(lines)]
+        idempotency_key = idempotency_key or hashlib.sha256(
+            json.dumps([invoice_data, lines], sort_keys=True, default=str).encode()
+        ).hexdigest()[:32]
+        journal_path = os.path.join(
+            os.getenv('PAYMO_INVOICE_JOURNAL_DIR', INVOICE_JOURNAL_DIR), f"{idempotency_key}.json"
+        )
+        journal = self._read_invoice_journal(journal_path)
+        resumed = journal['invoice'] is not None
+        
+        if not resumed:
+            embedded = lines[:INVOICE_LINES_PER_CREATE]
+            payload = dict(invoice_data, items=[dict(line) for line in embedded])
+            payload.setdefault('status', 'draft')
+            payload.setdefault('currency', 'USD')
+            
+            created = self._make_request('POST', 'invoices', payload)
+            invoice = created['invoices'][0]
+            items = invoice.get('invoiceitems') or invoice.get('items') or []
+            if embedded and len(items) < len(embedded):
+                # Not echoed back; read the invoice's lines once rather than assume
+                items = self.get_invoice_lines(invoice['id'])
+            if len(items) < len(embedded):
+                logger.warning("Invoice %s confirmed %d of %d embedded lines; posting the rest",
+                               invoice['id'], len(items), len(embedded))
+            journal['invoice'] = invoice
+            # Only confirmed lines are journaled, so the rest are posted below
+            for key, item in zip(line_keys, items[:len(embedded)]):
+                journal['lines'][key] = item
+            self._write_invoice_journal(journal_path, journal)
+        
+        invoice_id = journal['invoice']['id']
+        for key, line in zip(line_keys, lines):
+            if key in journal['lines']:
+                continue
+            # On failure the journal keeps what was created; a retry sends only the rest
+            result = self.add_invoice_line(invoice_id, dict(line))
+            journal['lines'][key] = (result or {}).get('invoicelines', [{}])[0]
+            self._write_invoice_journal(journal_path, journal)
+        
+        return {
+            'invoice': journal['invoice'],
+            'lines': [journal['lines'][key] for key in line_keys],
+            'resumed': resumed
+        }
+    
+    @staticmethod
+    def _line_key(position: int, line: Dict) -> str:
+        content = json.dumps(line, sort_keys=True, default=str).encode()
+        return f"{position}:{hashlib.sha256(content).hexdigest()[:16]}"
+    
+    @staticmethod
+    def _read_invoice_journal(path: str) -> Dict:
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'invoice': None, 'lines': {}}
+    
+    @staticmethod
+    def _write_invoice_journal(path: str, journal: Dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(journal, f)
+        os.replace(tmp_path, path)
+    
     def send_invoice(self, invoice_id: str, message: str = None) -> Dict:
         """Send invoice to client"""
         data = {
@@ -170,33 +799,49 @@ class PaymoClient:
         response = self._make_request('GET', 'invoices', params)
         return response.get('invoices', [])
     
+    def get_invoice_lines(self, invoice_id: str = None) -> List[Dict]:
+        """Get invoice lines, optionally for a single invoice"""
+        params = {'where': f"invoice_id={invoice_id}"} if invoice_id else {}
+        response = self._make_request('GET', 'invoicelines', params)
+        return response.get('invoicelines', [])
+    
+    def get_updated_since(self, resource: str, timestamp: str) -> List[Dict]:
+        """Get records of a resource (entries, invoices, ...) updated after an ISO timestamp"""
+        params = {'where': f'updated_on>"{timestamp}"'}
+        response = self._make_request('GET', resource, params)
+        return response.get(resource, [])
+    
     # Reports
     def get_project_profitability(self, project_id: str) -> Dict:
         """Get profitability report for a project"""
         return self._make_request('GET', f'reports/project/{project_id}/profitability')
     
-    def get_client_summary(self, client_id: str) -> Dict:
+    def get_client_summary(self, client_id: str, max_workers: int = 4) -> Dict:
         """Get summary report for a client"""
-        projects = self.get_projects()
-        client_projects = [p for p in projects if p.get('client_id') == client_id]
+        params = {'where': f'client_id={client_id} and active=true'}
+        client_projects = self._make_request('GET', 'projects', params).get('projects', [])
         
-        total_revenue = 0
-        total_hours = 0
+        totals = self._project_entry_totals([p['id'] for p in client_projects], max_workers)
+        return client_summary(client_id, client_projects, totals)
+    
+    def get_all_client_summaries(self, max_workers: int = 4) -> Dict[str, Dict]:
+        """Get summary reports for every client in one pass, keyed by client ID"""
+        projects = self.get_projects()
+        totals = self._project_entry_totals([p['id'] for p in projects], max_workers)
+        return client_summaries(projects, totals)
+    
+    def _project_entry_totals(self, project_ids: Iterable, max_workers: int) -> Dict:
+        """Sum entry seconds and billed amounts per project
         
-        for project in client_projects:
-            # Get project revenue and hours
-            entries = self._make_request('GET', 'entries', {'where': f'project_id={project["id"]}'})
-            for entry in entries.get('entries', []):
-                total_hours += entry.get('duration', 0) / 3600  # Convert to hours
-                total_revenue += entry.get('billed_amount', 0)
+        Projects are fetched in batches of PROJECT_ID_BATCH with a single
+        ``project_id in (...)`` filter each, batches running concurrently.
+        """
+        def fetch_batch(where):
+            return self._make_request('GET', 'entries', {'where': where}).get('entries', [])
         
-        return {
-            'client_id': client_id,
-            'total_projects': len(client_projects),
-            'total_hours': round(total_hours, 2),
-            'total_revenue': round(total_revenue, 2),
-            'active_projects': len([p for p in client_projects if p.get('active')])
-        }
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = [entry for page in executor.map(fetch_batch, entry_filters(project_ids)) for entry in page]
+        return entry_totals(entries)
 
 
 # CLI interface
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Paymo time-entry warehouse for PineAI Consulting
+Keeps a local columnar copy of time entries and invoice lines for
+portfolio-wide profitability reports
+"""
+
+import os
+import sys
+import json
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    import numpy
+except ImportError:  # optional: vectorized group sums
+    numpy = None
+
+from integrations.paymo.paymo_client import PaymoClient
+
+DEFAULT_PATH = os.path.join(
+    os.getenv('PINEAI_CACHE_DIR', os.path.expanduser('~/.pineai')), 'paymo_warehouse'
+)
+
+# Column name -> array typecode
+ENTRY_COLUMNS = {
+    'entry_id': 'q',
+    'project': 'q',
+    'client': 'q',
+    'user': 'q',
+    'week': 'q',
+    'seconds': 'd',
+    'revenue': 'd'
+}
+LINE_COLUMNS = {
+    'line_id': 'q',
+    'project': 'q',
+    'client': 'q',
+    'week': 'q',
+    'amount': 'd'
+}
+DIMENSIONS = ('project', 'client', 'user', 'week')
+
+
+def iso_week(day: str) -> str:
+    year, week, _ = datetime.strptime(day[:10], '%Y-%m-%d').isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def group_sums(keys: array, weights: array, size: int) -> List[float]:
+    """Sum weights per dictionary-encoded key"""
+    if numpy is not None and len(keys):
+        sums = numpy.bincount(
+            numpy.frombuffer(keys, dtype=numpy.int64),
+            weights=numpy.frombuffer(weights, dtype=numpy.float64),
+            minlength=size
+        )
+        return sums.tolist()
+
+    sums = [0.0] * size
+    for key, weight in zip(keys, weights):
+        sums[key] += weight
+    return sums
+
+
+class TimeWarehouse:
+    """Columnar, incrementally synced store of Paymo time entries and invoice lines"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('PAYMO_WAREHOUSE_DIR', DEFAULT_PATH)
+        self.entries = {name: array(code) for name, code in ENTRY_COLUMNS.items()}
+        self.lines = {name: array(code) for name, code in LINE_COLUMNS.items()}
+        # Dictionary encoding: dimension -> list of values, value -> index
+        self.values: Dict[str, List] = {name: [] for name in DIMENSIONS}
+        self._codes: Dict[str, Dict] = {name: {} for name in DIMENSIONS}
+        self.invoices: Dict[str, Dict] = {}
+        self.last_sync: Optional[str] = None
+        self._entry_rows: Dict[int, int] = {}
+        self._line_rows: Dict[int, int] = {}
+
+        if os.path.exists(os.path.join(self.path, 'meta.json')):
+            self.load()
+
+    # Encoding
+    def _code(self, dimension: str, value) -> int:
+        codes = self._codes[dimension]
+        if value not in codes:
+            codes[value] = len(self.values[dimension])
+            self.values[dimension].append(value)
+        return codes[value]
+
+    def _upsert(self, table: Dict[str, array], rows: Dict[int, int], key: int, record: Dict):
+        row = rows.get(key)
+        if row is None:
+            rows[key] = len(next(iter(table.values())))
+            for name, column in table.items():
+                column.append(record[name])
+        else:
+            for name, column in table.items():
+                column[row] = record[name]
+
+    def add_entry(self, entry: Dict, client_by_project: Dict):
+        day = entry.get('date') or (entry.get('start_time') or '')[:10]
+        self._upsert(self.entries, self._entry_rows, entry['id'], {
+            'entry_id': entry['id'],
+            'project': self._code('project', entry.get('project_id')),
+            'client': self._code('client', client_by_project.get(entry.get('project_id'))),
+            'user': self._code('user', entry.get('user_id')),
+            'week': self._code('week', iso_week(day)),
+            'seconds': float(entry.get('duration', 0)),
+            'revenue': float(entry.get('billed_amount', 0))
+        })
+
+    def add_invoice_line(self, line: Dict):
+        invoice = self.invoices.get(str(line.get('invoice_id')), {})
+        self._upsert(self.lines, self._line_rows, line['id'], {
+            'line_id': line['id'],
+            'project': self._code('project', line.get('project_id')),
+            'client': self._code('client', invoice.get('client_id')),
+            'week': self._code('week', iso_week(invoice.get('date') or date.today().isoformat())),
+            'amount': float(line.get('amount', 0))
+        })
+
+    # Sync
+    def sync(self, client: Optional[PaymoClient] = None, backfill_from: str = '2020-01-01') -> Dict:
+        """Fetch entries and invoice lines changed since the last sync
+
+        The first run backfills entries from ``backfill_from`` using the
+        windowed parallel export.
+        """
+        client = client or PaymoClient()
+        started_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        client_by_project = {
+            project['id']: project.get('client_id')
+            for project in client.get_projects(active_only=False)
+        }
+
+        if self.last_sync:
+            entries = client.get_updated_since('entries', self.last_sync)
+            invoices = client.get_updated_since('invoices', self.last_sync)
+            lines = client.get_updated_since('invoicelines', self.last_sync)
+        else:
+            today = date.today().isoformat()
+            entries = client.iter_time_entries(backfill_from, today)
+            invoices = client.get_invoices()
+            lines = client.get_invoice_lines()
+
+        entry_count = 0
+        for entry in entries:
+            self.add_entry(entry, client_by_project)
+            entry_count += 1
+
+        for invoice in invoices:
+            self.invoices[str(invoice['id'])] = {
+                'client_id': invoice.get('client_id'),
+                'date': invoice.get('date')
+            }
+        for line in lines:
+            self.add_invoice_line(line)
+
+        # Overlap by a minute so entries saved during the sync are not missed
+        self.last_sync = (datetime.strptime(started_at, '%Y-%m-%dT%H:%M:%SZ')
+                          - timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.save()
+
+        return {'entries': entry_count, 'invoice_lines': len(lines), 'total_entries': len(self._entry_rows)}
+
+    # Reports
+    def profitability(self, cost_rates: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Hours, billed revenue, cost, margin and invoiced amounts by project, client, user and week
+
+        ``cost_rates`` maps Paymo user IDs to an hourly cost.
+        """
+        cost_rates = cost_rates or {}
+        user_rates = [float(cost_rates.get(user_id, 0)) for user_id in self.values['user']]
+
+        seconds = self.entries['seconds']
+        if numpy is not None and len(seconds):
+            user_codes = numpy.frombuffer(self.entries['user'], dtype=numpy.int64)
+            rates = numpy.asarray(user_rates, dtype=numpy.float64)[user_codes]
+            costs = array('d', (numpy.frombuffer(seconds, dtype=numpy.float64) / 3600 * rates).tobytes())
+        else:
+            costs = array('d', (s / 3600 * user_rates[u] for s, u in zip(seconds, self.entries['user'])))
+
+        report = {}
+        for dimension in DIMENSIONS:
+            size = len(self.values[dimension])
+            keys = self.entries[dimension]
+            hours = group_sums(keys, seconds, size)
+            revenue = group_sums(keys, self.entries['revenue'], size)
+            cost = group_sums(keys, costs, size)
+            invoiced = (group_sums(self.lines[dimension], self.lines['amount'], size)
+                        if dimension in self.lines else [0.0] * size)
+
+            report[dimension] = [
+                {
+                    dimension: value,
+                    'hours': round(hours[i] / 3600, 2),
+                    'revenue': round(revenue[i], 2),
+                    'cost': round(cost[i], 2),
+                    'margin': round(revenue[i] - cost[i], 2),
+                    'invoiced': round(invoiced[i], 2)
+                }
+                for i, value in enumerate(self.values[dimension])
+                if hours[i] or revenue[i] or invoiced[i]
+            ]
+        return report
+
+    # Persistence
+    def save(self):
+        """Write columns and dictionaries to disk"""
+        os.makedirs(self.path, exist_ok=True)
+        for prefix, table in (('entries', self.entries), ('lines', self.lines)):
+            for name, column in table.items():
+                column_path = os.path.join(self.path, f"{prefix}.{name}.bin")
+                with open(f"{column_path}.tmp", 'wb') as f:
+                    column.tofile(f)
+                os.replace(f"{column_path}.tmp", column_path)
+
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump({
+                'last_sync': self.last_sync,
+                'values': self.values,
+                'invoices': self.invoices,
+                'entry_rows': len(self._entry_rows),
+                'line_rows': len(self._line_rows)
+            }, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def load(self):
+        """Read columns and dictionaries written by save()"""
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        self.last_sync = meta['last_sync']
+        self.values = meta['values']
+        self._codes = {name: {value: i for i, value in enumerate(values)} for name, values in self.values.items()}
+        self.invoices = meta['invoices']
+
+        for prefix, table, count in (('entries', self.entries, meta['entry_rows']),
+                                     ('lines', self.lines, meta['line_rows'])):
+            for name, column in table.items():
+                with open(os.path.join(self.path, f"{prefix}.{name}.bin"), 'rb') as f:
+                    column.fromfile(f, count)
+
+        self._entry_rows = {int(entry_id): row for row, entry_id in enumerate(self.entries['entry_id'])}
+        self._line_rows = {int(line_id): row for row, line_id in enumerate(self.lines['line_id'])}
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.paymo.time_warehouse [sync|report [project|client|user|week]]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    warehouse = TimeWarehouse()
+
+    if command == "sync":
+        result = warehouse.sync()
+        print(json.dumps(result, indent=2))
+
+    elif command == "report":
+        report = warehouse.profitability()
+        if len(sys.argv) > 2:
+            report = report[sys.argv[2]]
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Paymo timesheet importer for PineAI Consulting
+Streams time entries from CSV timesheets into Paymo
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from integrations.paymo.paymo_client import PaymoClient
+
+CACHE_DIR = os.getenv('PINEAI_CACHE_DIR', os.path.expanduser('~/.pineai'))
+
+# How long the project/task name lookup is trusted before it is rebuilt
+LOOKUP_TTL = 3600
+
+# Rows validated and submitted together; bounds memory for files of any size
+BATCH_SIZE = 200
+
+# Rows must have date, project, task and either hours or duration (seconds)
+REQUIRED_COLUMNS = ('date', 'project', 'task')
+
+MAX_REPORTED_ERRORS = 100
+
+# Where csv.DictReader puts values beyond the header's columns
+EXTRA_FIELDS = '_extra'
+
+
+def _name(value: Optional[str]) -> str:
+    return ' '.join((value or '').lower().split())
+
+
+class TaskLookup:
+    """Resolves (project name, task name) to Paymo task IDs"""
+
+    def __init__(self, client: PaymoClient, path: Optional[str] = None):
+        self.client = client
+        self.path = path or os.path.join(CACHE_DIR, 'paymo_task_lookup.json')
+        self.tasks: Dict[str, List[int]] = {}
+        self.loaded_at = 0.0
+
+    def load(self, refresh: bool = False):
+        """Load the lookup from disk if fresh, otherwise from one projects+tasks request"""
+        if not refresh and os.path.exists(self.path):
+            with open(self.path) as f:
+                stored = json.load(f)
+            if time.time() - stored['loaded_at'] < LOOKUP_TTL:
+                self.tasks, self.loaded_at = stored['tasks'], stored['loaded_at']
+                return
+
+        tree = self.client.get_project_tree(include=('tasks',), active_only=False)
+        tasks = {}
+        for project_id, project in tree.projects.items():
+            for task in tree.project_tasks(project_id):
+                key = f"{_name(project.get('name'))}|{_name(task.get('name'))}"
+                tasks.setdefault(key, []).append(task['id'])
+        self.tasks, self.loaded_at = tasks, time.time()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'loaded_at': self.loaded_at, 'tasks': self.tasks}, f)
+        os.replace(tmp_path, self.path)
+
+    def resolve(self, project: str, task: str) -> Tuple[Optional[int], Optional[str]]:
+        """Return (task_id, None) or (None, reason)"""
+        task_ids = self.tasks.get(f"{_name(project)}|{_name(task)}", [])
+        if not task_ids:
+            return None, f"unknown task '{task}' in project '{project}'"
+        if len(task_ids) > 1:
+            return None, f"ambiguous task '{task}' in project '{project}'"
+        return task_ids[0], None
+
+
+def read_batches(csv_path: str, batch_size: int = BATCH_SIZE) -> Iterator[List[Tuple[int, Dict]]]:
+    """Yield (line number, row) batches without loading the whole file"""
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f, restkey=EXTRA_FIELDS)
+        reader.fieldnames = [_name(column) for column in reader.fieldnames or []]
+        batch = []
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def row_digest(row: Dict) -> str:
+    return hashlib.sha256(json.dumps(row, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def row_key(csv_path: str, digest: str, occurrence: int) -> str:
+    """Stable journal key: file name, row content and how often that content occurred before
+    
+    Not tied to the line number, so inserting rows into a sheet doesn't re-key later rows.
+    """
+    return f"{os.path.basename(csv_path)}:{digest}:{occurrence}"
+
+
+def validate_row(row: Dict, lookup: TaskLookup) -> Tuple[Optional[Dict], Optional[str]]:
+    """Build a create_time_entry payload, or return the reason the row is invalid"""
+    if any((value or '').strip() for value in row.get(EXTRA_FIELDS) or []):
+        return None, "more fields than the header"
+    for column in REQUIRED_COLUMNS:
+        if not (row.get(column) or '').strip():
+            return None, f"missing {column}"
+
+    try:
+        day = datetime.strptime(row['date'].strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return None, f"invalid date '{row['date']}'"
+
+    try:
+        if (row.get('hours') or '').strip():
+            duration = int(round(float(row['hours']) * 3600))
+        else:
+            duration = int(row.get('duration') or 0)
+    except ValueError:
+        return None, "invalid hours/duration"
+    if duration <= 0:
+        return None, "hours/duration must be positive"
+
+    user_id = None
+    if (row.get('user_id') or '').strip():
+        try:
+            user_id = int(row['user_id'])
+        except ValueError:
+            return None, "invalid user_id"
+
+    task_id, reason = lookup.resolve(row['project'], row['task'])
+    if reason:
+        return None, reason
+
+    entry = {'task_id': task_id, 'date': day, 'duration': duration}
+    if (row.get('description') or '').strip():
+        entry['description'] = row['description'].strip()
+    if user_id is not None:
+        entry['user_id'] = user_id
+    return entry, None
+
+
+class ImportJournal:
+    """Append-only JSONL record of imported rows, so an interrupted import resumes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)['key'])
+                    except (ValueError, KeyError):
+                        continue  # partially written last line
+
+    def record(self, key: str, entry_id):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'key': key, 'entry_id': entry_id}) + '\n')
+            self.done.add(key)
+
+
+def import_timesheet(csv_path: str, client: Optional[PaymoClient] = None,
+                     journal_path: Optional[str] = None, max_workers: int = 8,
+                     dry_run: bool = False, refresh_lookup: bool = False) -> Dict:
+    """Create a Paymo time entry for every valid row of a CSV timesheet
+
+    Columns: date, project, task, hours (or duration in seconds) and optional
+    description and user_id. Requests are paced by the client's rate limiter.
+    Rows already in the journal (``<csv>.journal.jsonl`` by default) are skipped.
+    """
+    client = client or PaymoClient()
+    lookup = TaskLookup(client)
+    lookup.load(refresh=refresh_lookup)
+    journal = ImportJournal(journal_path or f"{csv_path}.journal.jsonl")
+
+    summary = {'rows': 0, 'imported': 0, 'skipped': 0, 'invalid': 0, 'failed': 0, 'errors': []}
+    occurrences = Counter()
+
+    def report(line_num: int, reason: str):
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line_num, 'error': reason})
+
+    def submit(item):
+        key, entry = item
+        result = client.create_time_entry(entry)
+        created = (result or {}).get('entries', [{}])[0]
+        journal.record(key, created.get('id'))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in read_batches(csv_path):
+            pending = []
+            for line_num, row in batch:
+                summary['rows'] += 1
+                digest = row_digest(row)
+                occurrences[digest] += 1
+                key = row_key(csv_path, digest, occurrences[digest])
+                if key in journal.done:
+                    summary['skipped'] += 1
+                    continue
+                entry, reason = validate_row(row, lookup)
+                if reason:
+                    summary['invalid'] += 1
+                    report(line_num, reason)
+                    continue
+                pending.append((line_num, key, entry))
+
+            if dry_run:
+                continue
+
+            futures = [(line_num, executor.submit(submit, (key, entry))) for line_num, key, entry in pending]
+            for line_num, future in futures:
+                try:
+                    future.result()
+                    summary['imported'] += 1
+                except Exception as e:
+                    summary['failed'] += 1
+                    report(line_num, str(e))
+
+    return summary
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "validate"):
+        print("Usage: python -m integrations.paymo.timesheet_import [import|validate] <timesheet.csv>")
+        sys.exit(1)
+
+    result = import_timesheet(sys.argv[2], dry_run=sys.argv[1] == "validate")
+    print(json.dumps(result, indent=2))
@@ -6,20 +6,155 @@ Handles payment processing and invoice generation
 
 import os
 import json
+import time
+import uuid
+import hashlib
+import threading
 import stripe
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Concurrent time slices a revenue scan is split into
+REVENUE_SLICES = 8
+
+# Objects per page when auto-paginating list calls (Stripe's maximum)
+LIST_PAGE_SIZE = 100
+
+CACHE_DIR = os.getenv('PINEAI_CACHE_DIR', os.path.expanduser('~/.pineai'))
+
+# How long a persisted price catalog is trusted before it is re-listed
+PRICE_CATALOG_TTL = 86400
+
+
+class PriceCatalog:
+    """Active prices keyed by (product, amount, currency, recurring)
+    
+    Warmed from Price.list and persisted locally, so payment links reuse
+    existing prices instead of creating a new one on every call. Prices
+    belong to one account and mode, so the catalog is scoped to the API key.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self._path = path or os.getenv('STRIPE_PRICE_CATALOG')
+        self.prices: Optional[Dict[str, str]] = None
+        self.warmed_at = 0.0
+        self.scope: Optional[str] = None
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+    
+    @staticmethod
+    def current_scope() -> str:
+        """Mode plus a fingerprint of the API key in use, e.g. ``test-3f1c9a0b7d2e``"""
+        api_key = stripe.api_key or ''
+        mode = 'live' if '_live_' in api_key else 'test'
+        return f"{mode}-{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
+    
+    @property
+    def path(self) -> str:
+        return self._path or os.path.join(CACHE_DIR, f"stripe_prices.{self.current_scope()}.json")
+    
+    @staticmethod
+    def key(product_id: str, unit_amount: int, currency: str = 'usd',
+            recurring: Optional[Dict] = None) -> str:
+        if recurring:
+            recurring = f"{recurring['interval']}:{recurring.get('interval_count', 1)}"
+        return f"{product_id}|{unit_amount}|{currency.lower()}|{recurring or 'one_time'}"
+    
+    def _price_key(self, price) -> Optional[str]:
+        if price.get('unit_amount') is None:  # tiered or custom-amount prices
+            return None
+        return self.key(price['product'], price['unit_amount'], price['currency'], price.get('recurring'))
+    
+    def warm(self):
+        """List every active price and persist the catalog"""
+        scope = self.current_scope()
+        prices = {}
+        for price in stripe.Price.list(active=True, limit=LIST_PAGE_SIZE).auto_paging_iter():
+            key = self._price_key(price)
+            if key:
+                prices.setdefault(key, price['id'])
+        
+        with self._lock:
+            self.prices = prices
+            self.warmed_at = time.time()
+            self.scope = scope
+            self._save()
+    
+    def _ensure_loaded(self):
+        scope = self.current_scope()
+        with self._lock:
+            if (self.prices is not None and self.scope == scope
+                    and time.time() - self.warmed_at < PRICE_CATALOG_TTL):
+                return
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    stored = json.load(f)
+                # An explicit path may be shared; only trust a catalog of this account and mode
+                if stored.get('scope') == scope and time.time() - stored['warmed_at'] < PRICE_CATALOG_TTL:
+                    self.prices, self.warmed_at, self.scope = stored['prices'], stored['warmed_at'], scope
+                    return
+        self.warm()
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'scope': self.scope, 'warmed_at': self.warmed_at, 'prices': self.prices}, f)
+        os.replace(tmp_path, self.path)
+    
+    def get_or_create(self, product_id: str, amount: float, currency: str = 'usd',
+                      recurring: Optional[Dict] = None) -> str:
+        """Return the ID of a matching active price, creating it only if none exists"""
+        self._ensure_loaded()
+        unit_amount = round(amount * 100)  # Convert to cents
+        # Create with exactly the fields the key is built from, so a key is never
+        # reused with different parameters (Stripe rejects that within 24 h)
+        currency = currency.lower()
+        if recurring:
+            recurring = {'interval': recurring['interval'], 'interval_count': recurring.get('interval_count', 1)}
+        key = self.key(product_id, unit_amount, currency, recurring)
+        
+        with self._lock:
+            if key in self.prices:
+                return self.prices[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # Concurrent callers for the same key wait for a single create
+        with key_lock:
+            with self._lock:
+                if key in self.prices:
+                    return self.prices[key]
+            
+            price = stripe.Price.create(
+                product=product_id,
+                unit_amount=unit_amount,
+                currency=currency,
+                recurring=recurring,
+                # Deterministic, so other processes racing on the same key get the same price
+                idempotency_key=f"price-{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+            )
+            with self._lock:
+                self.prices[key] = price.id
+                self._save()
+            return price.id
+
 
 class StripeClient:
     """Stripe API client for payments and invoicing"""
     
-    def __init__(self):
+    def __init__(self, price_catalog: Optional[PriceCatalog] = None, mirror=None):
         self.api_key = os.getenv('STRIPE_SECRET_KEY')
         stripe.api_key = self.api_key
+        self.price_catalog = price_catalog or PriceCatalog()
+        # Optional StripeMirror; fresh mirrors answer reads without an API call
+        self.mirror = mirror
+    
+    def _use_mirror(self, use_mirror: bool) -> bool:
+        return bool(self.mirror and use_mirror and self.mirror.is_fresh())
     
     # Customer Management
     def create_customer(self, customer_data: Dict) -> stripe.Customer:
@@ -35,8 +170,10 @@ class StripeClient:
         """Get customer by ID"""
         return stripe.Customer.retrieve(customer_id)
     
-    def search_customer_by_email(self, email: str) -> Optional[stripe.Customer]:
+    def search_customer_by_email(self, email: str, use_mirror: bool = True) -> Optional[stripe.Customer]:
         """Find customer by email"""
+        if self._use_mirror(use_mirror):
+            return self.mirror.search_customer_by_email(email)
         customers = stripe.Customer.list(email=email, limit=1)
         return customers.data[0] if customers.data else None
     
@@ -64,11 +201,24 @@ class StripeClient:
         )
     
     # Invoice Management
-    def create_invoice(self, invoice_data: Dict) -> stripe.Invoice:
-        """Create an invoice"""
-        # Create invoice
-        invoice = stripe.Invoice.create(
-            customer=invoice_data['customer_id'],
+    def create_invoice(self, invoice_data: Dict, one_shot: bool = False) -> stripe.Invoice:
+        """Create an invoice with its line items
+        
+        Items are created in order for the customer, without re-reading
+        the invoice. Every request carries an idempotency key derived from
+        ``invoice_data['idempotency_key']`` (random if omitted), so passing a
+        stable key makes a retried call return the same invoice and items.
+        
+        With ``one_shot`` the items are created as pending items first and the
+        invoice then pulls them in, so it is returned with its final totals.
+        Any other pending items of the customer are included as well.
+        """
+        customer_id = invoice_data['customer_id']
+        key = invoice_data.get('idempotency_key') or uuid.uuid4().hex
+        line_items = invoice_data.get('line_items', [])
+        
+        params = dict(
+            customer=customer_id,
             description=invoice_data.get('description'),
             metadata=invoice_data.get('metadata', {}),
             auto_advance=False,  # Don't auto-finalize
@@ -76,29 +226,61 @@ class StripeClient:
             days_until_due=invoice_data.get('days_until_due', 30)
         )
         
-        # Add line items if provided
-        for item in invoice_data.get('line_items', []):
+        if one_shot:
+            self._create_invoice_items(customer_id, None, line_items, key)
+            return stripe.Invoice.create(
+                pending_invoice_items_behavior='include',
+                idempotency_key=f"{key}-invoice",
+                **params
+            )
+        
+        # Items attach to the draft explicitly, so pending items are left alone
+        invoice = stripe.Invoice.create(
+            pending_invoice_items_behavior='exclude',
+            idempotency_key=f"{key}-invoice",
+            **params
+        )
+        self._create_invoice_items(customer_id, invoice.id, line_items, key)
+        return invoice
+    
+    def _create_invoice_items(self, customer_id: str, invoice_id: Optional[str],
+                              line_items: List[Dict], key: str) -> List[stripe.InvoiceItem]:
+        # One at a time: Stripe orders invoice lines by creation
+        return [
             self.add_invoice_item(
-                invoice.id,
+                invoice_id,
                 item['description'],
                 item['amount'],
-                item.get('quantity', 1)
+                item.get('quantity', 1),
+                customer_id=customer_id,
+                idempotency_key=f"{key}-item-{i}"
             )
-        
-        return invoice
+            for i, item in enumerate(line_items)
+        ]
     
-    def add_invoice_item(self, invoice_id: str, description: str, 
-                        amount: float, quantity: int = 1) -> stripe.InvoiceItem:
-        """Add item to an invoice"""
-        invoice = stripe.Invoice.retrieve(invoice_id)
+    def add_invoice_item(self, invoice_id: Optional[str], description: str,
+                        amount: float, quantity: int = 1,
+                        customer_id: Optional[str] = None,
+                        idempotency_key: Optional[str] = None) -> stripe.InvoiceItem:
+        """Add item to an invoice (or a pending item when invoice_id is None)
         
-        return stripe.InvoiceItem.create(
-            customer=invoice.customer,
-            invoice=invoice_id,
+        Pass ``customer_id`` when known to skip retrieving the invoice.
+        """
+        if customer_id is None:
+            customer_id = stripe.Invoice.retrieve(invoice_id).customer
+        
+        params = dict(
+            customer=customer_id,
             description=description,
             unit_amount=int(amount * 100),  # Convert to cents
             quantity=quantity
         )
+        if invoice_id:
+            params['invoice'] = invoice_id
+        if idempotency_key:
+            params['idempotency_key'] = idempotency_key
+        
+        return stripe.InvoiceItem.create(**params)
     
     def send_invoice(self, invoice_id: str) -> stripe.Invoice:
         """Finalize and send invoice"""
@@ -109,8 +291,11 @@ class StripeClient:
         return stripe.Invoice.send_invoice(invoice_id)
     
     def get_invoices(self, customer_id: Optional[str] = None, 
-                    status: Optional[str] = None) -> List[stripe.Invoice]:
+                    status: Optional[str] = None, use_mirror: bool = True) -> List[stripe.Invoice]:
         """Get invoices with optional filters"""
+        if self._use_mirror(use_mirror):
+            return self.mirror.get_invoices(customer_id, status)
+        
         params = {'limit': 100}
         if customer_id:
             params['customer'] = customer_id
@@ -126,15 +311,16 @@ class StripeClient:
         line_items = []
         
         for item in link_data['items']:
-            # Create price if not exists
+            # Reuse a matching price, creating one only if none exists
             if 'price_id' in item:
                 price_id = item['price_id']
             else:
-                price = self.create_price({
-                    'product_id': item['product_id'],
-                    'amount': item['amount']
-                })
-                price_id = price.id
+                price_id = self.price_catalog.get_or_create(
+                    item['product_id'],
+                    item['amount'],
+                    item.get('currency', 'usd'),
+                    item.get('recurring')
+                )
             
             line_items.append({
                 'price': price_id,
@@ -174,41 +360,66 @@ class StripeClient:
             return stripe.Subscription.cancel(subscription_id)
     
     # Reporting
-    def get_revenue_summary(self, start_date: datetime, end_date: datetime) -> Dict:
-        """Get revenue summary for date range"""
-        # Get successful charges
-        charges = stripe.Charge.list(
-            created={
-                'gte': int(start_date.timestamp()),
-                'lte': int(end_date.timestamp())
-            },
-            status='succeeded',
-            limit=100
-        )
-        
-        total_revenue = sum(charge.amount for charge in charges.data) / 100
+    def get_revenue_summary(self, start_date: datetime, end_date: datetime,
+                            slices: int = REVENUE_SLICES,
+                            include: Tuple[str, ...] = ('charges', 'invoices'),
+                            use_mirror: bool = True) -> Dict:
+        """Get revenue summary for date range
         
-        # Get invoices
-        invoices = stripe.Invoice.list(
-            created={
-                'gte': int(start_date.timestamp()),
-                'lte': int(end_date.timestamp())
-            },
-            status='paid',
-            limit=100
-        )
+        The range is split into ``slices`` time slices that are paginated
+        concurrently and aggregated as pages arrive. Stripe list calls can't
+        select fields, so ``include`` skips the charge or invoice scan when
+        only the other half of the summary is needed.
+        """
+        gte, lte = int(start_date.timestamp()), int(end_date.timestamp())
         
-        invoice_revenue = sum(invoice.amount_paid for invoice in invoices.data) / 100
+        if self._use_mirror(use_mirror):
+            totals = self.mirror.revenue_totals({'gte': gte, 'lt': lte + 1}, include)
+        else:
+            ranges = self._created_slices(gte, lte, slices)
+            scans = [(resource, created) for resource in include for created in ranges]
+            with ThreadPoolExecutor(max_workers=max(1, len(scans))) as executor:
+                results = list(executor.map(lambda scan: self._scan_revenue(*scan), scans))
+            
+            totals = {'charges': [0, 0], 'invoices': [0, 0]}
+            for (resource, _), (amount, count) in zip(scans, results):
+                totals[resource][0] += amount
+                totals[resource][1] += count
         
         return {
             'period_start': start_date.isoformat(),
             'period_end': end_date.isoformat(),
-            'total_revenue': total_revenue,
-            'invoice_revenue': invoice_revenue,
-            'transaction_count': len(charges.data),
-            'paid_invoices': len(invoices.data)
+            'total_revenue': totals['charges'][0] / 100,
+            'invoice_revenue': totals['invoices'][0] / 100,
+            'transaction_count': totals['charges'][1],
+            'paid_invoices': totals['invoices'][1]
         }
     
+    @staticmethod
+    def _created_slices(gte: int, lte: int, slices: int) -> List[Dict]:
+        """Split an inclusive timestamp range into contiguous ``created`` filters"""
+        slices = max(1, min(slices, lte - gte + 1))
+        step = (lte - gte + 1) / slices
+        bounds = [gte + int(step * i) for i in range(slices)] + [lte + 1]
+        return [{'gte': bounds[i], 'lt': bounds[i + 1]} for i in range(slices)]
+    
+    @staticmethod
+    def _scan_revenue(resource: str, created: Dict) -> Tuple[int, int]:
+        """Sum succeeded charges or paid invoices in one slice, in cents"""
+        amount = count = 0
+        if resource == 'charges':
+            # Charge.list has no status filter, so failed charges are skipped here
+            for charge in stripe.Charge.list(created=created, limit=LIST_PAGE_SIZE).auto_paging_iter():
+                if charge.status == 'succeeded':
+                    amount += charge.amount
+                    count += 1
+        else:
+            pages = stripe.Invoice.list(created=created, status='paid', limit=LIST_PAGE_SIZE)
+            for invoice in pages.auto_paging_iter():
+                amount += invoice.amount_paid
+                count += 1
+        return amount, count
+    
     # Webhook handling
     def construct_webhook_event(self, payload: str, sig_header: str) -> stripe.Event:
         """Verify and construct webhook event"""
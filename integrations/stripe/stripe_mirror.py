@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Stripe mirror for PineAI Consulting
+Keeps Postgres copies of customers, invoices, charges and subscriptions
+current from the Stripe Events API
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import stripe
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+from integrations.stripe.stripe_client import LIST_PAGE_SIZE, StripeClient
+from scripts.setup.init_database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Object type -> (table, list resource, mirrored columns besides id/created)
+MIRRORED = {
+    'customer': ('stripe_customers', stripe.Customer, ('email', 'phone', 'name')),
+    'invoice': ('stripe_invoices', stripe.Invoice, ('customer', 'status', 'number', 'amount_due', 'amount_paid', 'due_date')),
+    'charge': ('stripe_charges', stripe.Charge, ('customer', 'status', 'amount')),
+    'subscription': ('stripe_subscriptions', stripe.Subscription, ('customer', 'status'))
+}
+
+# Earliest created time scanned by the backfill
+BACKFILL_SINCE = int(datetime(2011, 1, 1).timestamp())
+
+# Concurrent created-time slices per object type in the backfill
+BACKFILL_SLICES = 4
+
+# Events applied per transaction during incremental sync
+SYNC_BATCH_SIZE = 500
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-10:] if digits else None
+
+
+def as_dict(obj) -> Dict:
+    """Plain nested dict of a Stripe object, from its public JSON form"""
+    return json.loads(str(obj))
+
+
+def _row(obj: Dict, columns: Tuple[str, ...], version: int, deleted: bool = False) -> tuple:
+    values = [obj['id']]
+    for column in columns:
+        value = obj.get(column)
+        if column == 'customer' and isinstance(value, dict):  # expanded
+            value = value.get('id')
+        values.append(normalize_phone(value) if column == 'phone' else value)
+    return (*values, obj.get('created'), deleted, version, json.dumps(obj))
+
+
+def upsert_rows(cursor, table: str, columns: Tuple[str, ...], rows: List[tuple]):
+    """Insert or update mirror rows, never replacing a row written from a newer event"""
+    all_columns = ('id', *columns, 'created', 'deleted', 'version', 'data')
+    query = sql.SQL("""
+        INSERT INTO {table} ({columns}) VALUES %s
+        ON CONFLICT (id) DO UPDATE SET {updates}
+        WHERE {table}.version <= EXCLUDED.version
+    """).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, all_columns)),
+        updates=sql.SQL(', ').join(
+            sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(column)) for column in all_columns[1:]
+        )
+    )
+    execute_values(cursor, query.as_string(cursor), rows, page_size=LIST_PAGE_SIZE)
+
+
+class StripeMirror:
+    """Postgres mirror of Stripe objects, synced incrementally from events"""
+
+    def __init__(self, max_staleness: float = 900):
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self.conn = self._connect()
+
+    @staticmethod
+    def _connect():
+        return get_db_connection(database=os.getenv('POSTGRES_DB', 'pineai'))
+
+    def _get_state(self, cursor, key: str) -> Optional[str]:
+        cursor.execute("SELECT value FROM stripe_sync_state WHERE key = %s", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, cursor, key: str, value: str):
+        cursor.execute("""
+            INSERT INTO stripe_sync_state (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        """, (key, value))
+
+    # Sync
+    def sync(self) -> Dict:
+        """Apply events since the stored cursor, backfilling on the first run"""
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            event_cursor = self._get_state(cursor, 'event_cursor')
+        if event_cursor is None:
+            return self.backfill()
+
+        params = {'limit': LIST_PAGE_SIZE}
+        if event_cursor:
+            params['ending_before'] = event_cursor
+
+        applied = 0
+        batch = []
+        try:
+            # With ending_before, pages are walked toward newer events, oldest first
+            events = stripe.Event.list(**params).auto_paging_iter()
+            if not event_cursor:
+                events = reversed(list(events))
+            for event in events:
+                batch.append(event)
+                if len(batch) >= SYNC_BATCH_SIZE:
+                    applied += self._apply_events(batch)
+                    batch = []
+        except stripe.error.InvalidRequestError:
+            # Events are kept for 30 days; an expired cursor needs a fresh backfill
+            logger.warning("Stripe event cursor %s is no longer available, backfilling", event_cursor)
+            return self.backfill()
+        applied += self._apply_events(batch)
+
+        return {'mode': 'events', 'applied': applied}
+
+    def _apply_events(self, events: List) -> int:
+        """Apply events oldest first in one transaction and advance the cursor"""
+        rows: Dict[str, Dict[str, tuple]] = {}
+        for event in events:
+            obj = event['data']['object']
+            # Objects without an id (e.g. upcoming invoices) have nothing to mirror
+            if obj.get('object') not in MIRRORED or not obj.get('id'):
+                continue
+            table, _, columns = MIRRORED[obj['object']]
+            # A subscription's deleted event means canceled; the object is kept
+            deleted = event['type'].endswith('.deleted') and obj['object'] != 'subscription'
+            # Later events for the same object replace earlier ones in the batch
+            rows.setdefault(table, {})[obj['id']] = _row(as_dict(obj), columns, event['created'], deleted)
+
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            for table, _, columns in MIRRORED.values():
+                if rows.get(table):
+                    upsert_rows(cursor, table, columns, list(rows[table].values()))
+            if events:
+                self._set_state(cursor, 'event_cursor', events[-1]['id'])
+            self._set_state(cursor, 'last_sync_at', str(time.time()))
+        return sum(len(table_rows) for table_rows in rows.values())
+
+    def backfill(self, slices: int = BACKFILL_SLICES) -> Dict:
+        """Copy every mirrored object with concurrent paginated scans
+
+        The event cursor is taken before scanning, so changes made during
+        the backfill are replayed by the next sync. Backfilled rows are
+        versioned with the start time and never overwrite newer events.
+        """
+        started_at = int(time.time())
+        latest = stripe.Event.list(limit=1).data
+        event_cursor = latest[0].id if latest else ''
+
+        ranges = StripeClient._created_slices(BACKFILL_SINCE, started_at, slices)
+        scans = [(object_type, created) for object_type in MIRRORED for created in ranges]
+        with ThreadPoolExecutor(max_workers=len(scans)) as executor:
+            counts = list(executor.map(lambda scan: self._backfill_scan(*scan, started_at), scans))
+
+        totals = {object_type: 0 for object_type in MIRRORED}
+        for (object_type, _), count in zip(scans, counts):
+            totals[object_type] += count
+
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            self._set_state(cursor, 'event_cursor', event_cursor)
+            self._set_state(cursor, 'last_sync_at', str(time.time()))
+        return {'mode': 'backfill', **totals}
+
+    def _backfill_scan(self, object_type: str, created: Dict, version: int) -> int:
+        table, resource, columns = MIRRORED[object_type]
+        params = {'created': created, 'limit': LIST_PAGE_SIZE}
+        if object_type == 'subscription':
+            params['status'] = 'all'  # the default omits canceled subscriptions
+
+        conn = self._connect()
+        count = 0
+        try:
+            with conn, conn.cursor() as cursor:
+                page = []
+                for obj in resource.list(**params).auto_paging_iter():
+                    page.append(_row(as_dict(obj), columns, version))
+                    if len(page) >= LIST_PAGE_SIZE:
+                        upsert_rows(cursor, table, columns, page)
+                        count += len(page)
+                        page = []
+                if page:
+                    upsert_rows(cursor, table, columns, page)
+                    count += len(page)
+        finally:
+            conn.close()
+        return count
+
+    # Reads
+    def is_fresh(self) -> bool:
+        """Whether the mirror was synced within max_staleness seconds"""
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            last_sync = self._get_state(cursor, 'last_sync_at')
+        return bool(last_sync) and time.time() - float(last_sync) < self.max_staleness
+
+    def _fetch_objects(self, query, params: tuple) -> List[Dict]:
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_invoices(self, customer_id: Optional[str] = None, status: Optional[str] = None,
+                     limit: int = 100) -> List[stripe.Invoice]:
+        conditions = [sql.SQL("NOT deleted")]
+        params = []
+        if customer_id:
+            conditions.append(sql.SQL("customer = %s"))
+            params.append(customer_id)
+        if status:
+            conditions.append(sql.SQL("status = %s"))
+            params.append(status)
+        query = sql.SQL("SELECT data FROM stripe_invoices WHERE {} ORDER BY created DESC LIMIT %s").format(
+            sql.SQL(' AND ').join(conditions)
+        )
+        return [stripe.Invoice.construct_from(data, stripe.api_key)
+                for data in self._fetch_objects(query, (*params, limit))]
+
+    def search_customer_by_email(self, email: str) -> Optional[stripe.Customer]:
+        customers = self._fetch_objects(
+            "SELECT data FROM stripe_customers WHERE email = %s AND NOT deleted ORDER BY created DESC LIMIT 1",
+            (email,)
+        )
+        return stripe.Customer.construct_from(customers[0], stripe.api_key) if customers else None
+
+    def latest_invoice_for_phone(self, phone: str) -> Optional[stripe.Invoice]:
+        """Most recent open (or else any) invoice of the customer with this phone number"""
+        invoices = self._fetch_objects("""
+            SELECT i.data
+            FROM stripe_invoices i
+            JOIN stripe_customers c ON c.id = i.customer
+            WHERE c.phone = %s AND NOT c.deleted AND NOT i.deleted AND i.status <> 'draft'
+            ORDER BY (i.status = 'open') DESC, i.created DESC
+            LIMIT 1
+        """, (normalize_phone(phone),))
+        return stripe.Invoice.construct_from(invoices[0], stripe.api_key) if invoices else None
+
+    def revenue_totals(self, created: Dict, include: Iterable[str] = ('charges', 'invoices')) -> Dict:
+        """Succeeded charge and paid invoice (amount, count) totals in cents"""
+        totals = {'charges': (0, 0), 'invoices': (0, 0)}
+        with self._lock, self.conn, self.conn.cursor() as cursor:
+            if 'charges' in include:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM stripe_charges
+                    WHERE status = 'succeeded' AND NOT deleted AND created >= %s AND created < %s
+                """, (created['gte'], created['lt']))
+                totals['charges'] = tuple(int(value) for value in cursor.fetchone())
+            if 'invoices' in include:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(amount_paid), 0), COUNT(*) FROM stripe_invoices
+                    WHERE status = 'paid' AND NOT deleted AND created >= %s AND created < %s
+                """, (created['gte'], created['lt']))
+                totals['invoices'] = tuple(int(value) for value in cursor.fetchone())
+        return totals
+
+
+# CLI interface
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.stripe.stripe_mirror [sync|backfill]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    StripeClient()  # sets the API key
+    mirror = StripeMirror()
+
+    if command == "sync":
+        print(json.dumps(mirror.sync(), indent=2))
+
+    elif command == "backfill":
+        print(json.dumps(mirror.backfill(), indent=2))
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Stripe webhook service for PineAI Consulting
+Receives signed webhook events into a Postgres queue and applies them to
+the clients and invoices tables in batches
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import psycopg2
+import stripe
+
+from scripts.setup.init_database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = '/stripe/webhook'
+
+# Events claimed and applied per worker transaction
+BATCH_SIZE = 100
+
+# Events that keep failing are left in the queue with their error after this
+MAX_ATTEMPTS = 5
+
+# Stripe invoice status -> invoices.status
+INVOICE_STATUSES = {
+    'draft': 'draft',
+    'open': 'sent',
+    'paid': 'paid',
+    'void': 'void',
+    'uncollectible': 'uncollectible'
+}
+
+
+class ConnectionPool:
+    """Small thread-safe pool of database connections for request handlers"""
+
+    def __init__(self, size: int = 8):
+        self._connections = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(None)
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            if conn is None or conn.closed:
+                conn = get_db_connection(database=os.getenv('POSTGRES_DB', 'pineai'))
+                conn.autocommit = True
+            yield conn
+        except psycopg2.Error:
+            conn = None  # drop a possibly broken connection
+            raise
+        finally:
+            self._connections.put(conn)
+
+
+def enqueue_event(conn, event: Dict) -> bool:
+    """Store a verified event; returns False if it was already queued"""
+    obj = event.get('data', {}).get('object', {})
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO stripe_events (event_id, type, object_id, created, payload)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (event_id) DO NOTHING
+        """, (event['id'], event['type'], obj.get('id'), event['created'], json.dumps(event)))
+        return cursor.rowcount == 1
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Verifies the Stripe signature, queues the event and acknowledges"""
+
+    pool: ConnectionPool = None
+    secret: str = None
+
+    def do_POST(self):
+        if self.path != WEBHOOK_PATH:
+            return self._respond(404, {'error': 'not found'})
+
+        payload = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            event = stripe.Webhook.construct_event(
+                payload, self.headers.get('Stripe-Signature', ''), self.secret
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return self._respond(400, {'error': 'invalid payload or signature'})
+
+        try:
+            with self.pool.connection() as conn:
+                queued = enqueue_event(conn, json.loads(payload))
+        except psycopg2.Error:
+            logger.exception("Failed to queue Stripe event %s", event.id)
+            # A non-2xx response makes Stripe retry the delivery
+            return self._respond(503, {'error': 'queue unavailable'})
+
+        self._respond(200, {'received': True, 'duplicate': not queued})
+
+    def _respond(self, status: int, body: Dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve(port: Optional[int] = None, pool_size: int = 8):
+    """Run the webhook receiver until interrupted"""
+    port = port or int(os.getenv('STRIPE_WEBHOOK_PORT', '8090'))
+    WebhookHandler.pool = ConnectionPool(pool_size)
+    WebhookHandler.secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), WebhookHandler)
+    server.daemon_threads = True
+    print(f"Listening for Stripe webhooks on :{port}{WEBHOOK_PATH}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# Applying events
+def apply_customer(cursor, customer: Dict):
+    if not customer.get('email'):
+        return
+    cursor.execute("""
+        INSERT INTO clients (name, email, phone, stripe_customer_id)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (email) DO UPDATE
+        SET stripe_customer_id = EXCLUDED.stripe_customer_id,
+            phone = COALESCE(EXCLUDED.phone, clients.phone)
+    """, (customer.get('name') or customer['email'], customer['email'], customer.get('phone'), customer['id']))
+
+
+def apply_invoice(cursor, invoice: Dict, deleted: bool = False):
+    if deleted:
+        cursor.execute("DELETE FROM invoices WHERE stripe_invoice_id = %s", (invoice['id'],))
+        return
+
+    paid_at = (invoice.get('status_transitions') or {}).get('paid_at')
+    cursor.execute("""
+        INSERT INTO invoices (client_id, invoice_number, stripe_invoice_id, amount, status, due_date, paid_date)
+        VALUES (
+            (SELECT id FROM clients WHERE stripe_customer_id = %s LIMIT 1),
+            %s, %s, %s, %s, to_timestamp(%s)::date, to_timestamp(%s)::date
+        )
+        ON CONFLICT (stripe_invoice_id) DO UPDATE
+        SET client_id = COALESCE(EXCLUDED.client_id, invoices.client_id),
+            invoice_number = EXCLUDED.invoice_number,
+            amount = EXCLUDED.amount,
+            status = EXCLUDED.status,
+            due_date = EXCLUDED.due_date,
+            paid_date = EXCLUDED.paid_date
+    """, (
+        invoice.get('customer'),
+        invoice.get('number') or invoice['id'],  # drafts have no number yet
+        invoice['id'],
+        invoice.get('amount_due', 0) / 100,
+        INVOICE_STATUSES.get(invoice.get('status'), invoice.get('status')),
+        invoice.get('due_date'),
+        paid_at
+    ))
+
+
+def apply_event(cursor, event: Dict):
+    """Apply one event; types without a local table are acknowledged as no-ops"""
+    event_type = event['type']
+    obj = event['data']['object']
+    if event_type in ('customer.created', 'customer.updated'):
+        apply_customer(cursor, obj)
+    elif event_type.startswith('invoice.') and obj.get('object') == 'invoice':
+        apply_invoice(cursor, obj, deleted=event_type == 'invoice.deleted')
+
+
+def process_batch(conn, batch_size: int = BATCH_SIZE) -> int:
+    """Claim, apply and mark one batch of queued events in a single transaction
+
+    SKIP LOCKED lets any number of workers share the queue. Within a batch
+    events are applied oldest first, and an event is skipped when a newer
+    event for the same object has already been applied.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT event_id, object_id, created, payload
+            FROM stripe_events
+            WHERE processed_at IS NULL AND attempts < %s
+            ORDER BY created, event_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (MAX_ATTEMPTS, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            conn.commit()
+            return 0
+
+        # Serialize workers touching the same objects; sorted to avoid deadlocks
+        for object_id in sorted({row[1] for row in rows if row[1]}):
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (object_id,))
+
+        processed: List[str] = []
+        for event_id, object_id, created, payload in rows:
+            cursor.execute("""
+                SELECT 1 FROM stripe_events
+                WHERE object_id = %s AND created > %s AND processed_at IS NOT NULL
+                LIMIT 1
+            """, (object_id, created))
+            if object_id and cursor.fetchone():
+                processed.append(event_id)
+                continue
+
+            cursor.execute("SAVEPOINT apply_event")
+            try:
+                apply_event(cursor, payload)
+                cursor.execute("RELEASE SAVEPOINT apply_event")
+                processed.append(event_id)
+            except Exception as e:
+                # Any failure, including a payload of an unexpected shape, counts as an
+                # attempt, so a bad event is parked at MAX_ATTEMPTS instead of blocking the queue
+                logger.warning("Failed to apply Stripe event %s: %r", event_id, e)
+                cursor.execute("ROLLBACK TO SAVEPOINT apply_event")
+                cursor.execute(
+                    "UPDATE stripe_events SET attempts = attempts + 1, error_message = %s WHERE event_id = %s",
+                    (f"{type(e).__name__}: {e}", event_id)
+                )
+
+        if processed:
+            cursor.execute(
+                "UPDATE stripe_events SET processed_at = CURRENT_TIMESTAMP, error_message = NULL "
+                "WHERE event_id = ANY(%s)",
+                (processed,)
+            )
+    conn.commit()
+    return len(rows)
+
+
+def run_worker(batch_size: int = BATCH_SIZE, poll_interval: float = 0.5, once: bool = False) -> int:
+    """Apply queued events until interrupted (or until the queue is empty with ``once``)"""
+    conn = get_db_connection(database=os.getenv('POSTGRES_DB', 'pineai'))
+    total = 0
+    try:
+        while True:
+            try:
+                count = process_batch(conn, batch_size)
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+            total += count
+            if count < batch_size:
+                if once:
+                    return total
+                time.sleep(poll_interval)
+    finally:
+        conn.close()
+
+
+# CLI interface
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.stripe.webhook_service [serve [port]|worker|drain]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "serve":
+        serve(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+
+    elif command == "worker":
+        run_worker()
+
+    elif command == "drain":
+        print(json.dumps({'processed': run_worker(once=True)}, indent=2))
@@ -19,7 +19,7 @@ load_dotenv()
 class TwilioClient:
     """Twilio client for SMS and voice communications"""
     
-    def __init__(self):
+    def __init__(self, stripe_mirror=None):
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.phone_number = os.getenv('TWILIO_PHONE_NUMBER')
@@ -27,6 +27,9 @@ class TwilioClient:
         self.elevenlabs_voice_id = os.getenv('ELEVENLABS_VOICE_ID', 'EXAVITQu4vr4xnSDxMaL')
         
         self.client = Client(self.account_sid, self.auth_token)
+        
+        # Optional StripeMirror used to answer INVOICE texts without a Stripe call
+        self.stripe_mirror = stripe_mirror
     
     # SMS Functions
     def send_sms(self, to_number: str, message: str, media_url: Optional[str] = None) -> Dict:
@@ -169,7 +172,7 @@ class TwilioClient:
     def handle_incoming_sms(self, from_number: str, body: str) -> str:
         """Handle incoming SMS webhook"""
         # Process the message and return response
-        response_text = self._process_sms_command(body)
+        response_text = self._process_sms_command(body, from_number)
         
         # Log the interaction
         self._log_interaction({
@@ -182,7 +185,7 @@ class TwilioClient:
         
         return response_text
     
-    def _process_sms_command(self, message: str) -> str:
+    def _process_sms_command(self, message: str, from_number: Optional[str] = None) -> str:
         """Process SMS commands"""
         message_lower = message.lower().strip()
         
@@ -191,12 +194,29 @@ class TwilioClient:
         elif 'status' in message_lower:
             return "Your project is on track. Next milestone: AI Agent deployment on Monday."
         elif 'invoice' in message_lower:
+            if self.stripe_mirror and from_number:
+                invoice = self.stripe_mirror.latest_invoice_for_phone(from_number)
+                if invoice:
+                    return self._invoice_reply(invoice)
             return "Your latest invoice (#INV-2025-001) for $3,000 is due on Feb 15. Payment link: pay.pineai.com/abc123"
         elif 'contact' in message_lower:
             return "I'll have someone call you within 2 hours. Or book directly: pineaiconsulting.com/schedule"
         else:
             return "Thanks for your message. Reply HELP for options or visit pineaiconsulting.com"
     
+    @staticmethod
+    def _invoice_reply(invoice) -> str:
+        number = invoice.get('number') or invoice['id']
+        if invoice.get('status') == 'paid':
+            return f"Your latest invoice (#{number}) for ${invoice['amount_paid'] / 100:,.2f} is paid. Thank you!"
+        
+        reply = f"Your latest invoice (#{number}) for ${invoice['amount_due'] / 100:,.2f}"
+        if invoice.get('due_date'):
+            reply += f" is due on {datetime.fromtimestamp(invoice['due_date']):%b %d}"
+        if invoice.get('hosted_invoice_url'):
+            reply += f". Payment link: {invoice['hosted_invoice_url']}"
+        return reply
+    
     def _log_interaction(self, interaction_data: Dict):
         """Log interaction for analytics"""
         # In production, this would write to database
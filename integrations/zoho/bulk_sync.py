@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Zoho CRM Bulk Read sync for PineAI Consulting
+Mirrors CRM leads into the clients table without per-record API calls
+"""
+
+import io
+import os
+import csv
+import json
+import sys
+import tempfile
+import zipfile
+from typing import Dict, Optional
+
+from psycopg2 import sql
+
+from integrations.zoho.zoho_client import ZohoCRMClient
+from scripts.setup.init_database import get_db_connection
+
+# Fields exported for the clients mirror (the CSV always includes Id)
+LEAD_FIELDS = ['First_Name', 'Last_Name', 'Email', 'Phone', 'Company', 'Modified_Time']
+
+STAGING_TABLE = 'zoho_leads_staging'
+
+
+def export_leads(client: ZohoCRMClient, work_dir: str, poll_interval: float = 10):
+    """Run Bulk Read jobs page by page and yield the path of each zipped CSV"""
+    page = 1
+    while True:
+        job_id = client.create_bulk_read_job('Leads', fields=LEAD_FIELDS, page=page)
+        job = client.wait_for_bulk_read_job(job_id, poll_interval=poll_interval)
+
+        path = os.path.join(work_dir, f"leads_{page}.zip")
+        yield client.download_bulk_read_result(job_id, path)
+        os.remove(path)
+
+        if not job.get('result', {}).get('more_records'):
+            break
+        page += 1
+
+
+def copy_csv_into_staging(cursor, zip_path: str):
+    """COPY every CSV in the archive into the staging table, streaming from the zip"""
+    with zipfile.ZipFile(zip_path) as archive:
+        for name in archive.namelist():
+            with archive.open(name) as raw:
+                stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                columns = next(csv.reader([stream.readline()]))
+
+                cursor.execute(sql.SQL("CREATE TEMP TABLE IF NOT EXISTS {} ({}) ON COMMIT DROP").format(
+                    sql.Identifier(STAGING_TABLE),
+                    sql.SQL(', ').join(
+                        sql.SQL('{} TEXT').format(sql.Identifier(column)) for column in columns
+                    )
+                ))
+                cursor.copy_expert(
+                    sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+                        sql.Identifier(STAGING_TABLE),
+                        sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+                    ).as_string(cursor),
+                    stream
+                )
+
+
+def merge_staging_into_clients(cursor) -> Dict:
+    """Update clients matched by zoho_lead_id and insert the rest"""
+    cursor.execute(f"""
+        UPDATE clients c
+        SET name = COALESCE(NULLIF(TRIM(CONCAT_WS(' ', s."First_Name", s."Last_Name")), ''), c.name),
+            phone = NULLIF(s."Phone", ''),
+            company = NULLIF(s."Company", '')
+        FROM {STAGING_TABLE} s
+        WHERE c.zoho_lead_id = s."Id"
+    """)
+    updated = cursor.rowcount
+
+    # Existing clients without a lead ID are linked by email rather than duplicated
+    cursor.execute(f"""
+        INSERT INTO clients (name, email, phone, company, zoho_lead_id)
+        SELECT DISTINCT ON (s."Email")
+            COALESCE(NULLIF(TRIM(CONCAT_WS(' ', s."First_Name", s."Last_Name")), ''), s."Email"),
+            s."Email",
+            NULLIF(s."Phone", ''),
+            NULLIF(s."Company", ''),
+            s."Id"
+        FROM {STAGING_TABLE} s
+        WHERE s."Email" <> ''
+          AND NOT EXISTS (SELECT 1 FROM clients c WHERE c.zoho_lead_id = s."Id")
+        ORDER BY s."Email", s."Modified_Time" DESC
+        ON CONFLICT (email) DO UPDATE
+        SET zoho_lead_id = EXCLUDED.zoho_lead_id
+        WHERE clients.zoho_lead_id IS NULL
+    """)
+    inserted = cursor.rowcount
+
+    return {'updated': updated, 'inserted_or_linked': inserted}
+
+
+def sync_leads_to_clients(client: Optional[ZohoCRMClient] = None, poll_interval: float = 10) -> Dict:
+    """Mirror every Zoho lead into the clients table in a single transaction"""
+    client = client or ZohoCRMClient()
+    conn = get_db_connection(database=os.getenv('POSTGRES_DB', 'pineai'))
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir, conn.cursor() as cursor:
+            staged = 0
+            for zip_path in export_leads(client, work_dir, poll_interval):
+                copy_csv_into_staging(cursor, zip_path)
+                cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(STAGING_TABLE)))
+                staged = cursor.fetchone()[0]
+
+            summary = {'staged': staged}
+            if staged:
+                summary.update(merge_staging_into_clients(cursor))
+        conn.commit()
+        return summary
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "leads":
+        print("Usage: python -m integrations.zoho.bulk_sync leads")
+        sys.exit(1)
+
+    result = sync_leads_to_clients()
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Duplicate lead detection for PineAI Consulting
+Finds near-duplicate Zoho leads without comparing every pair
+"""
+
+import re
+import sys
+import json
+import time
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from integrations.zoho.zoho_client import ZohoCRMClient
+
+DEDUPE_FIELDS = ['First_Name', 'Last_Name', 'Email', 'Phone', 'Company']
+
+COMPANY_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'plc', 'gmbh', 'lp', 'llp', 'pllc', 'the'
+}
+
+# Providers that ignore dots and +tags in the local part
+DOT_INSENSITIVE_DOMAINS = {'gmail.com', 'googlemail.com'}
+
+# Weight of each matching signal; a pair is a duplicate at MATCH_THRESHOLD
+WEIGHTS = {'email': 0.6, 'phone': 0.45, 'name': 0.35, 'company': 0.25}
+MATCH_THRESHOLD = 0.6
+
+# Subtracted when both email and phone are present on both leads and both
+# differ; one changed contact is common, two almost always mean two people
+CONTACT_CONFLICT_PENALTY = 0.4
+
+# Blocks larger than this (shared switchboard numbers, blank companies) are
+# too unspecific to be worth pairing
+MAX_BLOCK_SIZE = 50
+
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+_NON_DIGIT = re.compile(r'\D')
+
+
+class NormalizedLead(NamedTuple):
+    id: str
+    email: str
+    phone: str
+    company: str
+    company_tokens: frozenset
+    name_tokens: frozenset
+    last_name: str
+
+
+def normalize_email(email: Optional[str]) -> str:
+    if not email or '@' not in email:
+        return ''
+    local, domain = email.strip().lower().rsplit('@', 1)
+    local = local.split('+', 1)[0]
+    if domain in DOT_INSENSITIVE_DOMAINS:
+        local = local.replace('.', '')
+        domain = 'gmail.com'
+    return f"{local}@{domain}"
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    digits = _NON_DIGIT.sub('', phone or '')
+    return digits[-10:] if len(digits) >= 7 else ''
+
+
+def normalize_company(company: Optional[str]) -> Tuple[str, frozenset]:
+    words = _NON_WORD.sub(' ', (company or '').lower()).split()
+    tokens = [word for word in words if word not in COMPANY_SUFFIXES]
+    return ' '.join(tokens), frozenset(tokens)
+
+
+def normalize_lead(lead: Dict) -> NormalizedLead:
+    company, company_tokens = normalize_company(lead.get('Company'))
+    first = _NON_WORD.sub(' ', (lead.get('First_Name') or '').lower()).split()
+    last = _NON_WORD.sub(' ', (lead.get('Last_Name') or '').lower()).split()
+    return NormalizedLead(
+        id=str(lead['id']),
+        email=normalize_email(lead.get('Email')),
+        phone=normalize_phone(lead.get('Phone')),
+        company=company,
+        company_tokens=company_tokens,
+        name_tokens=frozenset(first + last),
+        last_name=' '.join(last)
+    )
+
+
+def blocking_keys(lead: NormalizedLead) -> List[str]:
+    """Keys shared by plausible duplicates; only leads sharing a key are compared"""
+    keys = []
+    if lead.email:
+        keys.append(f"e:{lead.email}")
+    if lead.phone:
+        keys.append(f"p:{lead.phone}")
+    if lead.company and lead.last_name:
+        keys.append(f"c:{lead.company}|{lead.last_name[:3]}")
+    if lead.name_tokens and lead.email:
+        domain = lead.email.rsplit('@', 1)[1]
+        keys.append(f"n:{' '.join(sorted(lead.name_tokens))}|{domain}")
+    return keys
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _conflicts(a: str, b: str) -> bool:
+    return bool(a and b and a != b)
+
+
+def score_pair(a: NormalizedLead, b: NormalizedLead) -> float:
+    """Similarity between 0 and 1 from email, phone, name and company signals"""
+    score = 0.0
+    if _conflicts(a.email, b.email) and _conflicts(a.phone, b.phone):
+        score -= CONTACT_CONFLICT_PENALTY
+    if a.email and a.email == b.email:
+        score += WEIGHTS['email']
+    if a.phone and a.phone == b.phone:
+        score += WEIGHTS['phone']
+    score += WEIGHTS['name'] * _jaccard(a.name_tokens, b.name_tokens)
+    if a.company and a.company == b.company:
+        score += WEIGHTS['company']
+    else:
+        score += WEIGHTS['company'] * _jaccard(a.company_tokens, b.company_tokens)
+    return min(max(score, 0.0), 1.0)
+
+
+class DedupeIndex:
+    """Incremental blocking index that groups duplicate leads into clusters"""
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD, max_block_size: int = MAX_BLOCK_SIZE):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.leads: Dict[str, NormalizedLead] = {}
+        self.blocks: Dict[str, List[str]] = defaultdict(list)
+        self._parent: Dict[str, str] = {}
+
+    def _find(self, lead_id: str) -> str:
+        parent = self._parent
+        root = lead_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[lead_id] != root:
+            parent[lead_id], lead_id = root, parent[lead_id]
+        return root
+
+    def _union(self, a: str, b: str):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[root_b] = root_a
+
+    def add(self, lead: Dict) -> List[Tuple[str, float]]:
+        """Index one lead and return the existing leads it duplicates, with scores"""
+        normalized = normalize_lead(lead)
+        lead_id = normalized.id
+        self.leads[lead_id] = normalized
+        self._parent.setdefault(lead_id, lead_id)
+
+        candidates = set()
+        for key in blocking_keys(normalized):
+            block = self.blocks[key]
+            if len(block) < self.max_block_size:
+                candidates.update(block)
+            block.append(lead_id)
+        candidates.discard(lead_id)
+
+        matches = []
+        for other_id in candidates:
+            score = score_pair(normalized, self.leads[other_id])
+            if score >= self.threshold:
+                matches.append((other_id, score))
+                self._union(other_id, lead_id)
+        return matches
+
+    def add_many(self, leads: Iterable[Dict]) -> int:
+        count = 0
+        for lead in leads:
+            self.add(lead)
+            count += 1
+        return count
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of two or more lead IDs that should be merged"""
+        groups = defaultdict(list)
+        for lead_id in self.leads:
+            groups[self._find(lead_id)].append(lead_id)
+        return [ids for ids in groups.values() if len(ids) > 1]
+
+
+def find_duplicate_leads(client: Optional[ZohoCRMClient] = None) -> List[List[str]]:
+    """Scan every Zoho lead and return merge clusters"""
+    client = client or ZohoCRMClient()
+    index = DedupeIndex()
+    index.add_many(client.iter_leads(fields=DEDUPE_FIELDS))
+    return index.clusters()
+
+
+def _synthetic_leads(count: int, duplicate_rate: float = 0.1, seed: int = 7):
+    """Generate leads with near-duplicates; returns (leads, {lead_id: original_id})"""
+    rng = random.Random(seed)
+    first_names = ['john', 'jane', 'alex', 'maria', 'wei', 'priya', 'omar', 'sara', 'liam', 'noah']
+    last_names = [f"{a}{b}" for a in ('smi', 'jon', 'gar', 'lee', 'pat', 'kim', 'ngu', 'bro')
+                  for b in ('th', 'son', 'cia', 'ford', 'el', 'ley', 'ton', 'er')]
+    suffixes = ['Inc', 'LLC', 'Ltd', 'Corp', '', 'Inc.']
+
+    leads, originals = [], {}
+    base_count = int(count / (1 + duplicate_rate))
+    for i in range(base_count):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        leads.append({
+            'id': str(i),
+            'First_Name': first.title(),
+            'Last_Name': last.title(),
+            'Email': f"{first}.{last}{i}@example{i % 500}.com",
+            'Phone': f"555{i:07d}",
+            'Company': f"Company{i % 20000} {rng.choice(suffixes)}".strip()
+        })
+
+    for j in range(count - base_count):
+        original = leads[rng.randrange(base_count)]
+        variant = dict(original, id=f"d{j}")
+        change = j % 3
+        if change == 0:
+            variant['Email'] = original['Email'].upper()
+        elif change == 1:
+            digits = original['Phone']
+            variant['Phone'] = f"+1 ({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+            variant['Email'] = ''
+        else:
+            variant['Company'] = f"{original['Company'].split()[0]}, {rng.choice(suffixes[:4])}"
+            variant['Email'] = f"x{j}@other.com"
+            variant['Phone'] = ''
+        leads.append(variant)
+        originals[variant['id']] = original['id']
+
+    rng.shuffle(leads)
+    return leads, originals
+
+
+def benchmark(count: int = 100000) -> Dict:
+    """Time indexing synthetic leads and measure recall and precision against known duplicates"""
+    leads, originals = _synthetic_leads(count)
+
+    start = time.perf_counter()
+    index = DedupeIndex()
+    index.add_many(leads)
+    clusters = index.clusters()
+    elapsed = time.perf_counter() - start
+
+    found = sum(1 for dup_id, original_id in originals.items()
+                if index._find(dup_id) == index._find(original_id))
+    # Every clustered lead but one per cluster was merged into another
+    merged = sum(len(ids) for ids in clusters) - len(clusters)
+
+    return {
+        'leads': len(leads),
+        'seconds': round(elapsed, 2),
+        'leads_per_second': int(len(leads) / elapsed),
+        'clusters': len(clusters),
+        'merged_leads': merged,
+        'known_duplicates': len(originals),
+        'recall': round(found / len(originals), 4) if originals else 1.0,
+        'precision': round(found / merged, 4) if merged else 1.0,
+        'false_merges': merged - found
+    }
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.zoho.lead_dedupe [scan|bench [count]]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "scan":
+        clusters = find_duplicate_leads()
+        print(json.dumps(clusters, indent=2))
+
+    elif command == "bench":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        print(json.dumps(benchmark(count), indent=2))
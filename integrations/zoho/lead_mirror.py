@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Local Zoho lead mirror for PineAI Consulting
+Answers duplicate checks from an indexed SQLite copy of the Leads module
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from integrations.zoho.zoho_client import CACHE_DIR, ZohoCRMClient
+
+MIRROR_FIELDS = [
+    'First_Name', 'Last_Name', 'Full_Name', 'Email', 'Phone', 'Mobile',
+    'Company', 'Lead_Source', 'Lead_Status', 'Modified_Time'
+]
+
+# Simple search criteria the mirror can answer, e.g. (Company:equals:Tech Corp)
+CRITERIA_PATTERN = re.compile(r'^\((Email|Phone|Company):equals:(.+)\)$')
+
+SYNC_BATCH_SIZE = 500
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value else None
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-10:] if digits else None
+
+
+def normalize_company(value: Optional[str]) -> Optional[str]:
+    return ' '.join(value.lower().split()) if value else None
+
+
+class LeadMirror:
+    """SQLite copy of Zoho leads indexed by email, phone and company"""
+
+    def __init__(self, path: Optional[str] = None, max_staleness: float = 900):
+        self.path = path or os.getenv('ZOHO_LEAD_MIRROR', os.path.join(CACHE_DIR, 'zoho_leads.db'))
+        self.max_staleness = max_staleness
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS leads (
+                    id TEXT PRIMARY KEY,
+                    email TEXT,
+                    phone TEXT,
+                    mobile TEXT,
+                    company TEXT,
+                    modified_time TEXT,
+                    record TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_email ON leads(email)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads(phone)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_mobile ON leads(mobile)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_company ON leads(company)")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    # Writes
+    def record(self, leads: Iterable[Dict]):
+        """Insert or update leads, merging partial records into stored ones"""
+        with self._lock, self.conn:
+            rows = []
+            for lead in leads:
+                existing = self.conn.execute(
+                    "SELECT record FROM leads WHERE id = ?", (lead['id'],)
+                ).fetchone()
+                merged = {**json.loads(existing[0]), **lead} if existing else dict(lead)
+                rows.append((
+                    merged['id'],
+                    normalize_email(merged.get('Email')),
+                    normalize_phone(merged.get('Phone')),
+                    normalize_phone(merged.get('Mobile')),
+                    normalize_company(merged.get('Company')),
+                    merged.get('Modified_Time'),
+                    json.dumps(merged)
+                ))
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO leads (id, email, phone, mobile, company, modified_time, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, lead_ids: Iterable[str]):
+        """Drop deleted leads from the mirror"""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM leads WHERE id = ?", [(lead_id,) for lead_id in lead_ids])
+
+    def sync(self, client: ZohoCRMClient, fields: Optional[List[str]] = None) -> Dict:
+        """Pull leads modified since the last sync (everything on the first run)"""
+        since = self._get_meta('last_modified_time')
+        latest = datetime.fromisoformat(since) if since else None
+        synced = 0
+
+        batch = []
+        for lead in client.iter_leads(fields=fields or MIRROR_FIELDS, modified_since=since):
+            batch.append(lead)
+            if lead.get('Modified_Time'):
+                modified = datetime.fromisoformat(lead['Modified_Time'])
+                latest = max(latest, modified) if latest else modified
+            if len(batch) >= SYNC_BATCH_SIZE:
+                self.record(batch)
+                synced += len(batch)
+                batch = []
+        if batch:
+            self.record(batch)
+            synced += len(batch)
+
+        deleted = [lead['id'] for lead in client.iter_deleted_leads(modified_since=since)] if since else []
+        self.remove(deleted)
+
+        with self._lock, self.conn:
+            if latest:
+                self._set_meta('last_modified_time', latest.isoformat())
+            self._set_meta('last_sync_at', str(time.time()))
+
+        return {'synced': synced, 'deleted': len(deleted), 'last_modified_time': self._get_meta('last_modified_time')}
+
+    # Reads
+    def is_fresh(self) -> bool:
+        """Whether the mirror was synced within max_staleness seconds"""
+        last_sync = self._get_meta('last_sync_at')
+        return bool(last_sync) and time.time() - float(last_sync) < self.max_staleness
+
+    def search(self, criteria: Dict) -> Optional[List[Dict]]:
+        """Answer a search_leads criteria dict, or return None if the mirror can't"""
+        if 'email' in criteria:
+            column, value = 'email', normalize_email(criteria['email'])
+        elif 'phone' in criteria:
+            column, value = 'phone', normalize_phone(criteria['phone'])
+        else:
+            match = CRITERIA_PATTERN.match(criteria.get('criteria', ''))
+            if not match:
+                return None
+            field, raw_value = match.groups()
+            column = field.lower()
+            value = {
+                'email': normalize_email,
+                'phone': normalize_phone,
+                'company': normalize_company
+            }[column](raw_value)
+
+        if column == 'phone':
+            query = "SELECT record FROM leads WHERE phone = ? OR mobile = ?"
+            params = (value, value)
+        else:
+            query = f"SELECT record FROM leads WHERE {column} = ?"
+            params = (value,)
+
+        try:
+            with self._lock:
+                rows = self.conn.execute(query, params).fetchall()
+        except sqlite3.Error:
+            return None
+        return [json.loads(row[0]) for row in rows]
+
+
+# CLI interface
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m integrations.zoho.lead_mirror [sync|search <email>]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    mirror = LeadMirror()
+
+    if command == "sync":
+        result = mirror.sync(ZohoCRMClient())
+        print(json.dumps(result, indent=2))
+
+    elif command == "search":
+        if len(sys.argv) < 3:
+            print("Usage: python -m integrations.zoho.lead_mirror search <email>")
+            sys.exit(1)
+
+        start = time.perf_counter()
+        result = mirror.search({'email': sys.argv[2]})
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(json.dumps(result, indent=2))
+        print(f"Answered in {elapsed_us:.0f} µs")
@@ -4,102 +4,585 @@ Zoho CRM API Client for PineAI Consulting
 """
 
 import os
+import re
 import json
+import math
+import time
+import fcntl
+import random
+import threading
 import requests
-from typing import Dict, List, Optional
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+from datetime import date, datetime
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: faster decoding of large pages
+    orjson = None
+
 load_dotenv()
 
+CACHE_DIR = os.getenv('PINEAI_CACHE_DIR', os.path.expanduser('~/.pineai'))
+
+# Tokens are refreshed in the background once they are this close to expiry
+TOKEN_REFRESH_MARGIN = 300
+
+# Maximum records accepted by a single insert/upsert call
+MAX_RECORDS_PER_CALL = 100
+
+DEFAULT_TRIGGERS = ('approval', 'workflow', 'blueprint')
+
+# Maximum rows returned by a single COQL statement
+COQL_PAGE_SIZE = 2000
+
+# How long the current user's ID is reused before it is looked up again
+CURRENT_USER_TTL = 3600
+
+# Responses retried with jittered exponential backoff (POSTs only retry 429)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+
+# Reads are only hedged once an endpoint has this many latency samples
+HEDGE_MIN_SAMPLES = 20
+
+
+def decode_json(response):
+    """Decode a JSON response body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (1 ms to ~2 min) for percentile estimates"""
+    
+    MIN_SECONDS = 0.001
+    GROWTH = 1.2
+    BUCKETS = 64
+    # Counts are halved past this many samples so old latencies fade out
+    DECAY_AT = 10000
+    
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        bucket = int(math.log(max(seconds, self.MIN_SECONDS) / self.MIN_SECONDS, self.GROWTH))
+        with self._lock:
+            self.counts[min(bucket, self.BUCKETS - 1)] += 1
+            self.total += 1
+            if self.total >= self.DECAY_AT:
+                self.counts = [count // 2 for count in self.counts]
+                self.total = sum(self.counts)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile, in seconds"""
+        with self._lock:
+            if not self.total:
+                return None
+            target = q * self.total
+            seen = 0
+            for bucket, count in enumerate(self.counts):
+                seen += count
+                if seen >= target:
+                    return self.MIN_SECONDS * self.GROWTH ** (bucket + 1)
+        return None
+
+
+class FileTokenCache:
+    """Access token cache shared between processes through a locked JSON file"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, 'zoho_token.json')
+        self.lock_path = f"{self.path}.lock"
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+    
+    def load(self) -> Optional[Dict]:
+        """Read the cached token, if any"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, token: Dict):
+        """Atomically replace the cached token"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(token, f)
+        os.replace(tmp_path, self.path)
+    
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock across processes"""
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RedisTokenCache:
+    """Access token cache shared between processes and hosts through Redis"""
+    
+    def __init__(self, url: Optional[str] = None, key: str = 'pineai:zoho:access_token'):
+        import redis
+        
+        self.redis = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379'))
+        self.key = key
+    
+    def load(self) -> Optional[Dict]:
+        """Read the cached token, if any"""
+        raw = self.redis.get(self.key)
+        return json.loads(raw) if raw else None
+    
+    def save(self, token: Dict):
+        """Store the token until it expires"""
+        ttl = max(int(token['expires_at'] - time.time()), 1)
+        self.redis.set(self.key, json.dumps(token), ex=ttl)
+    
+    def lock(self):
+        """Hold a lock shared by every worker using this Redis instance"""
+        return self.redis.lock(f"{self.key}:lock", timeout=60, blocking_timeout=60)
+
+
+def get_token_cache():
+    """Build the token cache selected by ZOHO_TOKEN_CACHE (file or redis)"""
+    if os.getenv('ZOHO_TOKEN_CACHE', 'file') == 'redis':
+        return RedisTokenCache()
+    return FileTokenCache(os.getenv('ZOHO_TOKEN_CACHE_FILE'))
+
+
+def coql_literal(value) -> str:
+    """Render a Python value as a COQL literal"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        # COQL needs an offset; naive datetimes are taken as local time
+        value = value.astimezone().isoformat(timespec='seconds')
+    elif isinstance(value, date):
+        value = value.isoformat()
+    escaped = str(value).replace('\\', '\\\\').replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+class Condition:
+    """A COQL WHERE expression; combine with & and |"""
+    
+    def __init__(self, text: str):
+        self.text = text
+    
+    def __and__(self, other: 'Condition') -> 'Condition':
+        return Condition(f"({self.text} and {other.text})")
+    
+    def __or__(self, other: 'Condition') -> 'Condition':
+        return Condition(f"({self.text} or {other.text})")
+    
+    def __str__(self) -> str:
+        return self.text
+
+
+class Field:
+    """COQL field reference, e.g. ``(Field('Lead_Status') == 'Hot') & (Field('Created_Time') >= week_start)``"""
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def _compare(self, operator: str, value) -> Condition:
+        return Condition(f"{self.name} {operator} {coql_literal(value)}")
+    
+    def __eq__(self, value) -> Condition:
+        return self._compare('=', value)
+    
+    def __ne__(self, value) -> Condition:
+        return self._compare('!=', value)
+    
+    def __lt__(self, value) -> Condition:
+        return self._compare('<', value)
+    
+    def __le__(self, value) -> Condition:
+        return self._compare('<=', value)
+    
+    def __gt__(self, value) -> Condition:
+        return self._compare('>', value)
+    
+    def __ge__(self, value) -> Condition:
+        return self._compare('>=', value)
+    
+    __hash__ = None
+    
+    def like(self, pattern: str) -> Condition:
+        return self._compare('like', pattern)
+    
+    def not_like(self, pattern: str) -> Condition:
+        return self._compare('not like', pattern)
+    
+    def in_(self, values: List) -> Condition:
+        return Condition(f"{self.name} in ({', '.join(coql_literal(v) for v in values)})")
+    
+    def not_in(self, values: List) -> Condition:
+        return Condition(f"{self.name} not in ({', '.join(coql_literal(v) for v in values)})")
+    
+    def between(self, low, high) -> Condition:
+        return Condition(f"{self.name} between {coql_literal(low)} and {coql_literal(high)}")
+    
+    def is_null(self) -> Condition:
+        return Condition(f"{self.name} is null")
+    
+    def is_not_null(self) -> Condition:
+        return Condition(f"{self.name} is not null")
+
 
 class ZohoCRMClient:
     """Zoho CRM API client with authentication and common operations"""
     
-    def __init__(self):
+    def __init__(self, token_cache=None, pool_size: int = None, lead_mirror=None,
+                 timeout: Optional[tuple] = None, max_retries: int = None,
+                 hedge_reads: bool = None):
         self.client_id = os.getenv('ZOHO_CLIENT_ID')
         self.client_secret = os.getenv('ZOHO_CLIENT_SECRET')
         self.refresh_token = os.getenv('ZOHO_REFRESH_TOKEN')
         self.accounts_url = os.getenv('ZOHO_ACCOUNTS_URL', 'https://accounts.zoho.com')
         self.api_url = os.getenv('ZOHO_API_URL', 'https://www.zohoapis.com')
         self.access_token = None
+        self.token_expires_at = 0.0
+        self.token_cache = token_cache or get_token_cache()
+        self._token_lock = threading.Lock()
+        self._background_refresh = None
         
-    def refresh_access_token(self):
-        """Refresh the access token using refresh token"""
-        url = f"{self.accounts_url}/oauth/v2/token"
-        data = {
-            'refresh_token': self.refresh_token,
-            'client_id': self.client_id,
-            'client_secret': self.client_secret,
-            'grant_type': 'refresh_token'
-        }
+        # Optional local LeadMirror that answers search_leads without an API call
+        self.lead_mirror = lead_mirror
+        
+        self._current_user_id = None
+        self._current_user_expires_at = 0.0
+        self._current_user_lock = threading.Lock()
+        
+        # Keep-alive connection pool shared by every request from this client
+        pool_size = pool_size or int(os.getenv('ZOHO_POOL_SIZE', '10'))
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
-        response = requests.post(url, data=data)
-        if response.status_code == 200:
-            self.access_token = response.json()['access_token']
-            return True
-        else:
-            print(f"Error refreshing token: {response.text}")
-            return False
+        # (connect, read) timeouts so a stalled socket can't block a worker forever
+        self.timeout = timeout or (
+            float(os.getenv('ZOHO_CONNECT_TIMEOUT', '3.05')),
+            float(os.getenv('ZOHO_READ_TIMEOUT', '30'))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('ZOHO_MAX_RETRIES', '3'))
+        
+        # Hedged GETs send a second copy once the first outlives the endpoint's p95
+        if hedge_reads is None:
+            hedge_reads = os.getenv('ZOHO_HEDGE_READS', 'false').lower() == 'true'
+        self.hedge_reads = hedge_reads
+        self.latency = defaultdict(LatencyHistogram)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=pool_size) if hedge_reads else None
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None):
-        """Make authenticated request to Zoho API"""
-        if not self.access_token:
-            self.refresh_access_token()
+    def _set_token(self, token: Dict):
+        self.access_token = token['access_token']
+        self.token_expires_at = token['expires_at']
+    
+    def refresh_access_token(self, stale_token: Optional[str] = None):
+        """Refresh the access token using refresh token
+        
+        Only one thread or process refreshes at a time. If another worker
+        already replaced ``stale_token`` in the shared cache, that token is
+        reused instead of making another OAuth round-trip.
+        """
+        stale_token = stale_token or self.access_token
+        
+        with self._token_lock, self.token_cache.lock():
+            cached = self.token_cache.load()
+            if (cached and cached['access_token'] != stale_token
+                    and cached['expires_at'] - TOKEN_REFRESH_MARGIN > time.time()):
+                self._set_token(cached)
+                return True
             
+            url = f"{self.accounts_url}/oauth/v2/token"
+            data = {
+                'refresh_token': self.refresh_token,
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'grant_type': 'refresh_token'
+            }
+            
+            response = self.session.post(url, data=data, timeout=self.timeout)
+            payload = decode_json(response) if response.status_code == 200 else {}
+            if 'access_token' in payload:
+                token = {
+                    'access_token': payload['access_token'],
+                    'expires_at': time.time() + int(payload.get('expires_in', 3600))
+                }
+                self.token_cache.save(token)
+                self._set_token(token)
+                return True
+            else:
+                print(f"Error refreshing token: {response.text}")
+                return False
+    
+    def _get_access_token(self) -> Optional[str]:
+        """Return a usable access token, refreshing it when needed"""
+        now = time.time()
+        if self.access_token and now < self.token_expires_at - TOKEN_REFRESH_MARGIN:
+            return self.access_token
+        
+        if self.access_token and now < self.token_expires_at:
+            # Still valid: keep serving requests while a background thread refreshes
+            if not (self._background_refresh and self._background_refresh.is_alive()):
+                self._background_refresh = threading.Thread(
+                    target=self.refresh_access_token,
+                    args=(self.access_token,),
+                    daemon=True
+                )
+                self._background_refresh.start()
+            return self.access_token
+        
+        cached = self.token_cache.load()
+        if cached and cached['expires_at'] > now:
+            self._set_token(cached)
+            return self._get_access_token()
+        
+        self.refresh_access_token()
+        return self.access_token
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      headers: Optional[Dict] = None, api: str = 'crm/v5',
+                      stream: bool = False):
+        """Make authenticated request to Zoho API"""
+        token = self._get_access_token()
         headers = {
-            'Authorization': f'Zoho-oauthtoken {self.access_token}',
-            'Content-Type': 'application/json'
+            'Authorization': f'Zoho-oauthtoken {token}',
+            'Content-Type': 'application/json',
+            **(headers or {})
         }
         
-        url = f"{self.api_url}/crm/v5/{endpoint}"
+        url = f"{self.api_url}/{api}/{endpoint}"
+        body = {'params': data} if method in ('GET', 'DELETE') else {'json': data}
+        body['stream'] = stream
+        key = f"{method} {re.sub(r'/[0-9]+', '/{id}', endpoint.split('?')[0])}"
         
-        if method == 'GET':
-            response = requests.get(url, headers=headers, params=data)
-        elif method == 'POST':
-            response = requests.post(url, headers=headers, json=data)
-        elif method == 'PUT':
-            response = requests.put(url, headers=headers, json=data)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=headers)
+        response = self._send(key, method, url, headers, body)
         
         # Retry with new token if unauthorized
         if response.status_code == 401:
-            self.refresh_access_token()
+            self.refresh_access_token(stale_token=token)
             headers['Authorization'] = f'Zoho-oauthtoken {self.access_token}'
-            
-            if method == 'GET':
-                response = requests.get(url, headers=headers, params=data)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=data)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers)
+            response = self._send(key, method, url, headers, body)
         
         return response
     
+    def _send(self, key: str, method: str, url: str, headers: Dict, body: Dict):
+        """Send a request, retrying 429/5xx and dropped connections with backoff"""
+        retry_statuses = {429} if method == 'POST' else RETRY_STATUSES
+        
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                if self.hedge_reads and method == 'GET' and not body['stream']:
+                    response = self._send_hedged(key, method, url, headers, body)
+                else:
+                    response = self._send_timed(key, method, url, headers, body)
+            except requests.ConnectTimeout:
+                if last_attempt:
+                    raise
+                self._backoff(attempt)
+                continue
+            except (requests.ConnectionError, requests.Timeout):
+                # A POST may already have been applied, so only reads are replayed
+                if method == 'POST' or last_attempt:
+                    raise
+                self._backoff(attempt)
+                continue
+            
+            if response.status_code not in retry_statuses or last_attempt:
+                return response
+            response.close()
+            self._backoff(attempt, response.headers.get('Retry-After'))
+    
+    def _send_timed(self, key: str, method: str, url: str, headers: Dict, body: Dict):
+        start = time.monotonic()
+        response = self.session.request(method, url, headers=headers, timeout=self.timeout, **body)
+        self.latency[key].record(time.monotonic() - start)
+        return response
+    
+    def _send_hedged(self, key: str, method: str, url: str, headers: Dict, body: Dict):
+        """Send a GET and, if it hasn't answered by the observed p95, race a second copy"""
+        histogram = self.latency[key]
+        threshold = histogram.percentile(0.95) if histogram.total >= HEDGE_MIN_SAMPLES else None
+        if threshold is None:
+            return self._send_timed(key, method, url, headers, body)
+        
+        first = self._hedge_pool.submit(self._send_timed, key, method, url, headers, body)
+        try:
+            return first.result(timeout=threshold)
+        except FutureTimeoutError:
+            pass
+        
+        second = self._hedge_pool.submit(self._send_timed, key, method, url, headers, body)
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() and pending:
+            return pending.pop().result()
+        return winner.result()
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None):
+        """Sleep for Retry-After, or a full-jitter exponential delay"""
+        if retry_after:
+            try:
+                time.sleep(float(retry_after))
+                return
+            except ValueError:
+                pass
+        time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+    
     def create_lead(self, lead_data: Dict) -> Dict:
         """Create a new lead in Zoho CRM"""
         data = {
             'data': [lead_data],
-            'trigger': ['approval', 'workflow', 'blueprint']
+            'trigger': list(DEFAULT_TRIGGERS)
         }
         
         response = self._make_request('POST', 'Leads', data)
-        return response.json()
+        result = decode_json(response)
+        
+        if self.lead_mirror:
+            created = result.get('data', [{}])[0]
+            if created.get('status') == 'success':
+                self.lead_mirror.record([dict(lead_data, id=created['details']['id'])])
+        
+        return result
     
-    def get_leads(self, page: int = 1, per_page: int = 200) -> Dict:
-        """Get leads with pagination"""
+    def get_leads(self, page: int = 1, per_page: int = 200,
+                  fields: Optional[List[str]] = None) -> Dict:
+        """Get leads with pagination, optionally returning only ``fields``"""
         params = {
             'page': page,
             'per_page': per_page,
             'sort_order': 'desc',
             'sort_by': 'Created_Time'
         }
+        if fields:
+            params['fields'] = ','.join(fields)
         
         response = self._make_request('GET', 'Leads', params)
-        return response.json()
+        return decode_json(response)
+    
+    def iter_leads(self, fields: Optional[List[str]] = None,
+                   modified_since: Optional[Union[datetime, str]] = None,
+                   per_page: int = 200, sort_by: str = 'Modified_Time',
+                   sort_order: str = 'asc') -> Iterator[Dict]:
+        """Yield every lead one at a time
+        
+        Pages are followed through ``page_token`` so scans are not limited by
+        Zoho's page-number cap. The next page is fetched on a background
+        thread while the caller works through the current one, so at most
+        two pages are held in memory.
+        """
+        params = {
+            'per_page': per_page,
+            'sort_order': sort_order,
+            'sort_by': sort_by
+        }
+        if fields:
+            params['fields'] = ','.join(fields)
+        
+        headers = {}
+        if modified_since:
+            if isinstance(modified_since, datetime):
+                modified_since = modified_since.astimezone().isoformat(timespec='seconds')
+            headers['If-Modified-Since'] = modified_since
+        
+        def fetch_page(page: int, page_token: Optional[str]):
+            page_params = dict(params)
+            if page_token:
+                page_params['page_token'] = page_token
+            else:
+                page_params['page'] = page
+            
+            response = self._make_request('GET', 'Leads', page_params, headers)
+            if response.status_code in (204, 304):
+                return [], {}
+            response.raise_for_status()
+            body = decode_json(response)
+            return body.get('data', []), body.get('info', {})
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = 1
+            future = executor.submit(fetch_page, page, None)
+            while future:
+                records, info = future.result()
+                future = None
+                if info.get('more_records'):
+                    page += 1
+                    future = executor.submit(fetch_page, page, info.get('next_page_token'))
+                
+                yield from records
+    
+    def iter_deleted_leads(self, modified_since: Optional[str] = None,
+                           per_page: int = 200) -> Iterator[Dict]:
+        """Yield leads deleted (or moved to the recycle bin) since a point in time"""
+        headers = {'If-Modified-Since': modified_since} if modified_since else {}
+        page = 1
+        while True:
+            params = {'type': 'all', 'page': page, 'per_page': per_page}
+            response = self._make_request('GET', 'Leads/deleted', params, headers)
+            if response.status_code in (204, 304):
+                return
+            response.raise_for_status()
+            body = decode_json(response)
+            
+            yield from body.get('data', [])
+            if not body.get('info', {}).get('more_records'):
+                return
+            page += 1
+    
+    def query(self, module: str, fields: List[str], where: Optional[Union[Condition, str]] = None,
+              order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+              offset: int = 0) -> Iterator[Dict]:
+        """Stream records selected with a COQL statement
+        
+        Filtering and projection happen server-side; results are paged
+        2,000 rows per statement with LIMIT/OFFSET.
+        """
+        # COQL requires a WHERE clause
+        where = where if where is not None else Field('id').is_not_null()
+        statement = f"select {', '.join(fields)} from {module} where {where}"
+        if order_by:
+            statement += f" order by {', '.join(order_by)}"
+        
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = COQL_PAGE_SIZE if remaining is None else min(remaining, COQL_PAGE_SIZE)
+            data = {'select_query': f"{statement} limit {page_size} offset {offset}"}
+            
+            response = self._make_request('POST', 'coql', data)
+            if response.status_code == 204:
+                return
+            response.raise_for_status()
+            body = decode_json(response)
+            records = body.get('data', [])
+            
+            yield from records
+            offset += len(records)
+            if remaining is not None:
+                remaining -= len(records)
+            if not records or not body.get('info', {}).get('more_records'):
+                return
     
     def update_lead(self, lead_id: str, update_data: Dict) -> Dict:
         """Update an existing lead"""
@@ -108,25 +591,141 @@ class ZohoCRMClient:
         }
         
         response = self._make_request('PUT', f'Leads/{lead_id}', data)
-        return response.json()
+        result = decode_json(response)
+        
+        if self.lead_mirror:
+            updated = result.get('data', [{}])[0]
+            if updated.get('status') == 'success':
+                # Merged into the stored record, so changed Email/Phone are searchable at once
+                self.lead_mirror.record([dict(update_data, id=str(lead_id))])
+        
+        return result
+    
+    def search_leads(self, criteria: Dict, use_mirror: bool = True, fallback: bool = True,
+                     fields: Optional[List[str]] = None) -> Dict:
+        """Search leads based on criteria, optionally returning only ``fields``
+        
+        When a lead mirror is attached it answers email, phone and simple
+        equals criteria locally. With ``fallback`` the API is used instead
+        whenever the mirror is stale or cannot answer; a stale mirror
+        still answers if the API rate-limits the search.
+        """
+        records = None
+        if self.lead_mirror and use_mirror:
+            records = self.lead_mirror.search(criteria)
+            if records is not None and fields:
+                records = [
+                    {key: record.get(key) for key in ['id', *fields]} for record in records
+                ]
+            if records is not None and (not fallback or self.lead_mirror.is_fresh()):
+                return self._mirror_result(records)
+        
+        params = dict(criteria)
+        if fields:
+            params['fields'] = ','.join(fields)
+        
+        response = self._make_request('GET', 'Leads/search', params)
+        if response.status_code == 429 and records is not None:
+            return self._mirror_result(records)
+        if response.status_code == 204:
+            return {'data': [], 'info': {'count': 0, 'more_records': False}}
+        return decode_json(response)
     
-    def search_leads(self, criteria: Dict) -> Dict:
-        """Search leads based on criteria"""
-        response = self._make_request('GET', 'Leads/search', criteria)
-        return response.json()
+    @staticmethod
+    def _mirror_result(records: List[Dict]) -> Dict:
+        return {
+            'data': records,
+            'info': {'count': len(records), 'more_records': False, 'source': 'mirror'}
+        }
     
     def create_deal(self, deal_data: Dict) -> Dict:
         """Create a new deal in Zoho CRM"""
         data = {
             'data': [deal_data],
-            'trigger': ['approval', 'workflow', 'blueprint']
+            'trigger': list(DEFAULT_TRIGGERS)
         }
         
         response = self._make_request('POST', 'Deals', data)
-        return response.json()
+        return decode_json(response)
+    
+    def upsert_leads(self, records: List[Dict], duplicate_check_fields: Optional[List[str]] = None,
+                     max_concurrency: int = 4, trigger=DEFAULT_TRIGGERS) -> List[Dict]:
+        """Insert or update many leads, 100 records per call
+        
+        Returns one result per input record, in input order.
+        """
+        extra = {}
+        if duplicate_check_fields:
+            extra['duplicate_check_fields'] = list(duplicate_check_fields)
+        
+        results = self._write_records('Leads/upsert', records, extra, max_concurrency, trigger)
+        
+        if self.lead_mirror:
+            self.lead_mirror.record(
+                dict(records[result['index']], id=result['id'])
+                for result in results if result['status'] == 'success'
+            )
+        
+        return results
+    
+    def create_deals(self, records: List[Dict], max_concurrency: int = 4,
+                     trigger=DEFAULT_TRIGGERS) -> List[Dict]:
+        """Create many deals, 100 records per call
+        
+        Returns one result per input record, in input order.
+        """
+        return self._write_records('Deals', records, {}, max_concurrency, trigger)
+    
+    def _write_records(self, endpoint: str, records: List[Dict], extra: Dict,
+                       max_concurrency: int, trigger) -> List[Dict]:
+        """POST records in chunks concurrently and map outcomes back to input positions"""
+        results = [None] * len(records)
+        chunks = [
+            (start, records[start:start + MAX_RECORDS_PER_CALL])
+            for start in range(0, len(records), MAX_RECORDS_PER_CALL)
+        ]
+        
+        def send_chunk(chunk):
+            start, batch = chunk
+            data = {'data': batch, 'trigger': list(trigger), **extra}
+            
+            try:
+                response = self._make_request('POST', endpoint, data)
+                body = decode_json(response) if response.content else {}
+            except (requests.RequestException, ValueError) as e:
+                body = {'code': 'REQUEST_FAILED', 'message': str(e)}
+            outcomes = body.get('data') or []
+            
+            for offset in range(len(batch)):
+                outcome = outcomes[offset] if offset < len(outcomes) else body
+                results[start + offset] = self._record_result(start + offset, outcome)
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            list(executor.map(send_chunk, chunks))
+        
+        return results
+    
+    @staticmethod
+    def _record_result(index: int, outcome: Dict) -> Dict:
+        """Flatten one per-record outcome from a write response"""
+        details = outcome.get('details') or {}
+        success = outcome.get('status') == 'success'
+        return {
+            'index': index,
+            'status': 'success' if success else 'error',
+            'action': outcome.get('action'),
+            'id': details.get('id') if success else None,
+            'code': outcome.get('code'),
+            'message': outcome.get('message'),
+            'details': details
+        }
     
     def convert_lead(self, lead_id: str, account_name: str, deal_name: str = None) -> Dict:
         """Convert lead to contact and optionally create a deal"""
+        response = self._convert_lead_request(lead_id, account_name, deal_name)
+        return decode_json(response)
+    
+    def _convert_lead_request(self, lead_id: str, account_name: str, deal_name: str = None):
         data = {
             'data': [{
                 'convert_to': 'Contacts',
@@ -140,14 +739,112 @@ class ZohoCRMClient:
             }]
         }
         
-        response = self._make_request('POST', f'Leads/{lead_id}/actions/convert', data)
-        return response.json()
+        return self._make_request('POST', f'Leads/{lead_id}/actions/convert', data)
+    
+    def convert_leads(self, batch: List[Dict], max_concurrency: int = 4) -> List[Dict]:
+        """Convert many leads concurrently
+        
+        Each item needs ``lead_id`` and ``account_name`` and may set
+        ``deal_name``. Rate-limited conversions are retried with backoff.
+        Returns one result per item, in input order.
+        """
+        # Resolve the owner once up front instead of once per conversion
+        self.get_current_user_id()
+        
+        def convert(indexed_item):
+            index, item = indexed_item
+            try:
+                response = self._convert_lead_request(
+                    item['lead_id'], item['account_name'], item.get('deal_name')
+                )
+            except requests.RequestException as e:
+                return self._conversion_result(index, item, {'code': 'REQUEST_FAILED', 'message': str(e)})
+            
+            body = decode_json(response) if response.content else {}
+            outcome = (body.get('data') or [body])[0]
+            return self._conversion_result(index, item, outcome)
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(convert, enumerate(batch)))
+    
+    @staticmethod
+    def _conversion_result(index: int, item: Dict, outcome: Dict) -> Dict:
+        """Flatten one lead conversion outcome"""
+        details = outcome.get('details') or outcome
+        
+        def record_id(module):
+            value = details.get(module)
+            return value.get('id') if isinstance(value, dict) else value
+        
+        success = outcome.get('status') == 'success' or bool(record_id('Contacts'))
+        return {
+            'index': index,
+            'lead_id': item['lead_id'],
+            'status': 'success' if success else 'error',
+            'contact_id': record_id('Contacts'),
+            'account_id': record_id('Accounts'),
+            'deal_id': record_id('Deals'),
+            'code': outcome.get('code'),
+            'message': outcome.get('message')
+        }
+    
+    # Bulk Read
+    def create_bulk_read_job(self, module: str = 'Leads', fields: Optional[List[str]] = None,
+                             criteria: Optional[Dict] = None, page: int = 1) -> str:
+        """Submit a Bulk Read export job and return its ID"""
+        query = {
+            'module': {'api_name': module},
+            'page': page
+        }
+        if fields:
+            query['fields'] = list(fields)
+        if criteria:
+            query['criteria'] = criteria
+        
+        response = self._make_request('POST', 'read', {'query': query}, api='crm/bulk/v5')
+        response.raise_for_status()
+        return decode_json(response)['data'][0]['details']['id']
+    
+    def get_bulk_read_job(self, job_id: str) -> Dict:
+        """Get the state (ADDED, QUEUED, IN PROGRESS, COMPLETED, FAILED) and result of a job"""
+        response = self._make_request('GET', f'read/{job_id}', api='crm/bulk/v5')
+        response.raise_for_status()
+        return decode_json(response)['data'][0]
+    
+    def wait_for_bulk_read_job(self, job_id: str, poll_interval: float = 10,
+                               timeout: float = 3600) -> Dict:
+        """Poll a Bulk Read job until it completes"""
+        deadline = time.time() + timeout
+        while True:
+            job = self.get_bulk_read_job(job_id)
+            if job['state'] == 'COMPLETED':
+                return job
+            if job['state'] == 'FAILED':
+                raise RuntimeError(f"Bulk read job {job_id} failed")
+            if time.time() > deadline:
+                raise TimeoutError(f"Bulk read job {job_id} still {job['state']} after {timeout}s")
+            time.sleep(poll_interval)
+    
+    def download_bulk_read_result(self, job_id: str, dest_path: str) -> str:
+        """Stream the zipped CSV result of a completed job to disk"""
+        response = self._make_request('GET', f'read/{job_id}/result', api='crm/bulk/v5', stream=True)
+        response.raise_for_status()
+        
+        with open(dest_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+        
+        return dest_path
     
-    def get_current_user_id(self) -> str:
-        """Get the current user's ID"""
-        response = self._make_request('GET', 'users?type=CurrentUser')
-        users = response.json().get('users', [])
-        return users[0]['id'] if users else None
+    def get_current_user_id(self, refresh: bool = False) -> str:
+        """Get the current user's ID (cached for CURRENT_USER_TTL seconds)"""
+        with self._current_user_lock:
+            if refresh or not self._current_user_id or time.time() > self._current_user_expires_at:
+                response = self._make_request('GET', 'users?type=CurrentUser')
+                users = decode_json(response).get('users', [])
+                self._current_user_id = users[0]['id'] if users else None
+                self._current_user_expires_at = time.time() + CURRENT_USER_TTL
+            return self._current_user_id
 
 
 # CLI interface
@@ -151,11 +151,98 @@ def create_tables():
         )
     """)
     
+    # Stripe webhook queue (event_id dedupes Stripe's retries)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_events (
+            event_id VARCHAR(100) PRIMARY KEY,
+            type VARCHAR(100) NOT NULL,
+            object_id VARCHAR(100),
+            created BIGINT NOT NULL,
+            payload JSONB NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            error_message TEXT,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP
+        )
+    """)
+    
+    # Stripe mirror (kept current from the Events API by stripe_mirror.py);
+    # version is the created time of the event a row was last written from
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_customers (
+            id VARCHAR(100) PRIMARY KEY,
+            email VARCHAR(255),
+            phone VARCHAR(20),
+            name VARCHAR(255),
+            created BIGINT,
+            deleted BOOLEAN DEFAULT FALSE,
+            version BIGINT NOT NULL,
+            data JSONB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_invoices (
+            id VARCHAR(100) PRIMARY KEY,
+            customer VARCHAR(100),
+            status VARCHAR(50),
+            number VARCHAR(100),
+            amount_due BIGINT,
+            amount_paid BIGINT,
+            due_date BIGINT,
+            created BIGINT,
+            deleted BOOLEAN DEFAULT FALSE,
+            version BIGINT NOT NULL,
+            data JSONB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_charges (
+            id VARCHAR(100) PRIMARY KEY,
+            customer VARCHAR(100),
+            status VARCHAR(50),
+            amount BIGINT,
+            created BIGINT,
+            deleted BOOLEAN DEFAULT FALSE,
+            version BIGINT NOT NULL,
+            data JSONB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_subscriptions (
+            id VARCHAR(100) PRIMARY KEY,
+            customer VARCHAR(100),
+            status VARCHAR(50),
+            created BIGINT,
+            deleted BOOLEAN DEFAULT FALSE,
+            version BIGINT NOT NULL,
+            data JSONB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_sync_state (
+            key VARCHAR(100) PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    
     # Create indexes
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_email ON clients(email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_zoho_lead ON clients(zoho_lead_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_projects_client ON projects(client_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_client ON invoices(client_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_status ON invoices(status)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_stripe_invoice ON invoices(stripe_invoice_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_stripe_customer ON clients(stripe_customer_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_stripe_events_pending ON stripe_events(created) WHERE processed_at IS NULL"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_events_object ON stripe_events(object_id, created)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_customers_email ON stripe_customers(email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_customers_phone ON stripe_customers(phone)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_invoices_customer ON stripe_invoices(customer, created)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_invoices_created ON stripe_invoices(created)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_charges_created ON stripe_charges(created)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_subscriptions_customer ON stripe_subscriptions(customer)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_communications_client ON communications(client_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_automation_logs_workflow ON automation_logs(workflow_name)")
     
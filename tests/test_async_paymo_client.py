@@ -0,0 +1,160 @@
+"""
+AsyncPaymoClient against a local mock Paymo server
+Run from the repository root: python -m pytest tests
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+import pytest
+
+from integrations.paymo.async_paymo_client import AsyncPaymoClient
+from integrations.paymo.paymo_client import PaymoClient
+
+PROJECTS = [{'id': 100 + i, 'name': f'P{i}', 'client_id': 1 + i % 4, 'active': True} for i in range(120)]
+TASKS = [{'id': 1000 + i, 'name': f'T{i}', 'project_id': 100 + i % 120} for i in range(240)]
+ENTRIES = [
+    {'id': 5000 + i, 'project_id': 100 + i % 120, 'duration': 1800, 'billed_amount': 25.0}
+    for i in range(600)
+]
+
+
+class MockPaymo(BaseHTTPRequestHandler):
+    """Serves projects, tasks and entries with optional latency and injected failures"""
+
+    protocol_version = 'HTTP/1.1'
+    state = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _track(self, delta):
+        with self.state['lock']:
+            self.state['in_flight'] += delta
+            self.state['max_in_flight'] = max(self.state['max_in_flight'], self.state['in_flight'])
+
+    def _fail(self, method):
+        failures = self.state['failures'].get(method)
+        if failures:
+            return failures.pop(0)
+
+    def do_GET(self):
+        self._track(1)
+        try:
+            self.state['requests'].append(('GET', self.path))
+            failure = self._fail('GET')
+            if failure:
+                return self._send(*failure)
+            time.sleep(self.state['delay'])
+
+            url = urlparse(self.path)
+            resource = url.path.rsplit('/', 1)[-1]
+            where = parse_qs(url.query).get('where', [''])[0]
+            if resource == 'projects':
+                return self._send(200, {'projects': PROJECTS})
+            if resource == 'tasks':
+                project_id = int(where.split('=')[1])
+                return self._send(200, {'tasks': [t for t in TASKS if t['project_id'] == project_id]})
+            if resource == 'entries':
+                project_ids = {int(pid) for pid in where[where.index('(') + 1:-1].split(',')}
+                return self._send(200, {'entries': [e for e in ENTRIES if e['project_id'] in project_ids]})
+            self._send(404, {'message': 'not found'})
+        finally:
+            self._track(-1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.state['requests'].append(('POST', self.path))
+        failure = self._fail('POST')
+        if failure:
+            return self._send(*failure)
+        self._send(201, {'entries': [{'id': 1}]})
+
+
+@pytest.fixture
+def paymo_server(monkeypatch):
+    MockPaymo.state = {
+        'lock': threading.Lock(), 'in_flight': 0, 'max_in_flight': 0,
+        'delay': 0.0, 'failures': {}, 'requests': []
+    }
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockPaymo)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('PAYMO_API_URL', f"http://127.0.0.1:{server.server_port}/api")
+    monkeypatch.setenv('PAYMO_API_KEY', 'test-key')
+    try:
+        yield MockPaymo.state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run(coroutine_function):
+    async def main():
+        async with AsyncPaymoClient(max_concurrency=20, max_retries=3) as client:
+            return await coroutine_function(client)
+    return asyncio.run(main())
+
+
+def test_project_fan_out_is_concurrent_and_bounded(paymo_server):
+    paymo_server['delay'] = 0.1
+    project_ids = [p['id'] for p in PROJECTS]
+
+    started = time.perf_counter()
+    tasks = run(lambda client: client.get_tasks_for_projects(project_ids))
+    elapsed = time.perf_counter() - started
+
+    assert list(tasks) == project_ids
+    assert all(len(tasks[pid]) == 2 for pid in project_ids)
+    # 120 requests of 0.1 s take 12 s one at a time; 20 at a time about 0.6 s
+    assert elapsed < 3
+    assert 1 < paymo_server['max_in_flight'] <= 20
+
+
+def test_client_summaries_match_sync_client(paymo_server):
+    summaries = run(lambda client: client.get_all_client_summaries())
+
+    # One entries request per PROJECT_ID_BATCH projects, not one per project
+    entry_requests = [path for method, path in paymo_server['requests'] if '/entries' in path]
+    assert len(entry_requests) == 3
+    assert summaries[1] == {
+        'client_id': 1, 'total_projects': 30, 'total_hours': 75.0,
+        'total_revenue': 3750.0, 'active_projects': 30
+    }
+    assert summaries == PaymoClient(cache_size=0).get_all_client_summaries()
+
+
+def test_rate_limited_get_is_retried(paymo_server):
+    paymo_server['failures']['GET'] = [(429, {'message': 'slow down'}, {'Retry-After': '0.05'})] * 2
+
+    projects = run(lambda client: client.get_projects())
+
+    assert len(projects) == len(PROJECTS)
+    assert len(paymo_server['requests']) == 3
+
+
+def test_failed_post_is_not_replayed(paymo_server):
+    paymo_server['failures']['POST'] = [(502, {'message': 'bad gateway'})]
+    entry = {'task_id': 1000, 'date': '2025-01-01', 'duration': 3600}
+
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        run(lambda client: client.create_time_entry(entry))
+
+    assert error.value.status == 502
+    assert paymo_server['requests'] == [('POST', '/api/entries')]